@@ -0,0 +1,116 @@
+"""End-to-end benchmark of the inbound pipeline against the cogw simulator.
+
+Drives the real HomeServerV2 connection loop, dispatcher and the value handlers
+of sensor entities and reports throughput, dispatch latency (websocket
+receive to entity update) and memory for several installation sizes.
+Requires Home Assistant to be installed.
+
+    python benchmarks/bench_pipeline.py --entities 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from custom_components.girahs import CONFIG_SCHEMA  # noqa: E402
+from custom_components.girahs.const import DOMAIN  # noqa: E402
+from custom_components.girahs.gira import HomeServerV2  # noqa: E402
+from custom_components.girahs.helper import from_ga  # noqa: E402
+from custom_components.girahs.sensor import HomeServerSensor  # noqa: E402
+from simulator import DISTRIBUTIONS, MODES, CogwSimulator  # noqa: E402
+
+FIRST_GA = 2048
+
+
+def build_config(port: int, entities: int) -> dict:
+    sensors = [
+        {
+            "name": f"Sensor {i}",
+            "state_address": from_ga(FIRST_GA + i),
+            "type": "percent",
+        }
+        for i in range(entities)
+    ]
+    config = {"host": f"127.0.0.1:{port}", "sensor": sensors, "sync_on_connect": False}
+    return CONFIG_SCHEMA({DOMAIN: config})[DOMAIN][0]
+
+
+async def run(args: argparse.Namespace, entities: int) -> dict:
+    simulator = CogwSimulator(
+        entities,
+        args.rate,
+        args.mode,
+        args.burst_size,
+        args.distribution,
+        first_ga=FIRST_GA,
+        seed=1,
+    )
+    port = await simulator.start()
+
+    tracemalloc.start()
+    api = HomeServerV2(build_config(port, entities))
+    sensors = [HomeServerSensor(s, api) for s in api.sensors]
+    # The entities are not added to Home Assistant, dispatch to them right away.
+    for sensor in sensors:
+        api.entity_attached(sensor)
+    api.set_ready()
+    _, setup_peak = tracemalloc.get_traced_memory()
+
+    await api.connect()
+    await simulator.wait_for_client()
+    start = time.monotonic()
+    await simulator.generate(args.count)
+    while api.metrics.telegrams_received < simulator.sent or len(api._dispatcher):
+        await asyncio.sleep(0.01)
+    elapsed = time.monotonic() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await api.disconnect()
+    await simulator.stop()
+
+    latency = api.metrics.dispatch_latency
+    return {
+        "entities": len(sensors),
+        "telegrams": simulator.sent,
+        "throughput": simulator.sent / elapsed,
+        "p50_ms": latency.percentile(50) * 1000,
+        "p99_ms": latency.percentile(99) * 1000,
+        "setup_mib": setup_peak / 2**20,
+        "peak_mib": peak / 2**20,
+        "coalesced": api._dispatcher.coalesced,
+        "dropped": api._dispatcher.dropped,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--count", type=int, default=50000, help="telegrams per run")
+    parser.add_argument("--rate", type=float, default=20000.0, help="telegrams/s")
+    parser.add_argument("--mode", choices=MODES, default="steady")
+    parser.add_argument("--burst-size", type=int, default=2000)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="percent")
+    args = parser.parse_args()
+
+    print(
+        f"{'entities':>8} {'telegrams':>9} {'tel/s':>9} {'p50 ms':>7} {'p99 ms':>7}"
+        f" {'setup MiB':>9} {'peak MiB':>8} {'coalesced':>9} {'dropped':>7}"
+    )
+    for entities in args.entities:
+        r = await run(args, entities)
+        print(
+            f"{r['entities']:>8} {r['telegrams']:>9} {r['throughput']:>9.0f}"
+            f" {r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} {r['setup_mib']:>9.1f}"
+            f" {r['peak_mib']:>8.1f} {r['coalesced']:>9} {r['dropped']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
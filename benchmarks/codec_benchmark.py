@@ -0,0 +1,58 @@
+"""Micro-benchmark of the per-telegram encode and decode cost.
+
+Compares the previous frame handling (create_cmd from tuples, to_ga string
+parsing and json.dumps/json.loads per telegram) with the precompiled frame
+prefixes and the codec used by the integration.
+
+    python benchmarks/codec_benchmark.py [-n ITERATIONS]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "girahs")
+)
+
+import codec  # noqa: E402
+import helper  # noqa: E402
+
+ADDRESS = "3/1/20"
+FRAME = '{"cmd": 1, "ga": 6420, "value": 42}'
+
+
+def legacy_encode(value):
+    cmd = dict([("cmd", 1), ("ga", helper.to_ga(ADDRESS)), ("value", value)])
+    return json.dumps(cmd)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    ga = helper.command_ga(ADDRESS)
+
+    def compiled_encode(value):
+        return codec.encode_command(helper.create_cmd(ga, value))
+
+    cases = [
+        ("encode int, legacy", lambda: legacy_encode(42)),
+        ("encode int, compiled", lambda: compiled_encode(42)),
+        ("encode float, legacy", lambda: legacy_encode(21.5)),
+        ("encode float, compiled", lambda: compiled_encode(21.5)),
+        ("decode, json", lambda: json.loads(FRAME)),
+        (f"decode, {codec.NAME}", lambda: codec.loads(FRAME)),
+    ]
+
+    print(f"codec: {codec.NAME}, {args.iterations} iterations")
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=args.iterations, repeat=5))
+        print(f"{name:<28} {best / args.iterations * 1e9:8.0f} ns/telegram")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Import time and resident memory of the configuration schema.
+
+Imports the KNX integration schema the configuration used to be built from
+and the complete integration, which no longer depends on it, each in a fresh
+interpreter, and reports the cost on top of the Home Assistant helpers both
+depend on.
+
+    python benchmarks/import_benchmark.py [-n REPEAT]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+BASELINE = "homeassistant.helpers.config_validation"
+MODULES = [
+    ("knx schema", "homeassistant.components.knx.schema"),
+    ("girahs integration", "custom_components.girahs"),
+]
+
+PROBE = """
+import resource, time
+import {baseline}
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def measure(module: str, repeat: int) -> tuple:
+    """Best import time in seconds and resident memory in KiB of the module."""
+    results = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(baseline=BASELINE, module=module)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        results.append((float(out[0]), int(out[1])))
+    return min(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    _, base_rss = measure("sys", args.repeat)
+    print(f"baseline: {BASELINE}, {base_rss / 1024:.1f} MiB resident")
+    for name, module in MODULES:
+        elapsed, rss = measure(module, args.repeat)
+        print(
+            f"{name:<20} {elapsed * 1e3:8.1f} ms  "
+            f"{(rss - base_rss) / 1024:+8.1f} MiB resident"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Local stand-in for the /cogw websocket endpoint of a Gira HomeServer.
+
+The simulator pushes value frames for a configurable set of group addresses,
+answers read requests and counts the commands it receives.
+
+    python benchmarks/simulator.py --port 8765 --addresses 1000 --rate 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+CMD_WRITE = 1
+CMD_READ = 3
+
+# The frame loop wakes up at this interval and sends the frames that are due.
+TICK = 0.01
+
+DISTRIBUTIONS = ("binary", "percent", "walk")
+MODES = ("steady", "bursty")
+
+
+class CogwSimulator(object):
+    def __init__(
+        self,
+        addresses: int = 100,
+        rate: float = 100.0,
+        mode: str = "steady",
+        burst_size: int = 500,
+        distribution: str = "percent",
+        first_ga: int = 1,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.gas = list(range(first_ga, first_ga + addresses))
+        self.rate = rate
+        self.mode = mode
+        self.burst_size = burst_size
+        self.distribution = distribution
+        self._random = random.Random(seed)
+        self._values = {ga: 0.0 for ga in self.gas}
+        self._clients: set = set()
+        self._server = None
+
+        self.sent = 0
+        self.commands = 0
+        self.reads = 0
+
+    def _next_value(self, ga: int):
+        if self.distribution == "binary":
+            return self._random.randint(0, 1)
+        if self.distribution == "percent":
+            return self._random.randint(0, 100)
+        value = self._values[ga] + self._random.gauss(0, 0.5)
+        self._values[ga] = value
+        return round(value, 2)
+
+    def _frame(self, ga: int) -> str:
+        return json.dumps({"cmd": CMD_WRITE, "ga": ga, "value": self._next_value(ga)})
+
+    async def _handler(self, websocket, path: Optional[str] = None) -> None:
+        self._clients.add(websocket)
+        try:
+            async for message in websocket:
+                cmd = json.loads(message)
+                if cmd.get("cmd") == CMD_READ:
+                    self.reads += 1
+                    await websocket.send(self._frame(cmd["ga"]))
+                else:
+                    self.commands += 1
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(websocket)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving, returns the port the simulator listens on."""
+        self._server = await websockets.serve(self._handler, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def wait_for_client(self) -> None:
+        while not self._clients:
+            await asyncio.sleep(TICK)
+
+    def _broadcast(self, count: int) -> None:
+        for _ in range(count):
+            frame = self._frame(self._random.choice(self.gas))
+            websockets.broadcast(self._clients, frame)
+            self.sent += 1
+
+    async def generate(self, count: int) -> None:
+        """Send count frames to all connected clients at the configured rate."""
+        start = time.monotonic()
+        base = self.sent
+        while self.sent - base < count:
+            elapsed = time.monotonic() - start
+            if self.mode == "bursty":
+                # Whole bursts, spaced so that the average rate is kept.
+                target = (
+                    int(elapsed * self.rate / self.burst_size + 1) * self.burst_size
+                )
+            else:
+                target = int(elapsed * self.rate) + 1
+            self._broadcast(min(target, count) - (self.sent - base))
+            await asyncio.sleep(TICK)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--addresses", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=100.0, help="telegrams/s")
+    parser.add_argument("--mode", choices=MODES, default="steady")
+    parser.add_argument("--burst-size", type=int, default=500)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="percent")
+    parser.add_argument("--count", type=int, default=10**9, help="stop after N")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = CogwSimulator(
+        args.addresses, args.rate, args.mode, args.burst_size, args.distribution
+    )
+    port = await simulator.start(args.host, args.port)
+    logger.info("Listening on ws://%s:%d/cogw", args.host, port)
+    while True:
+        await simulator.wait_for_client()
+        await simulator.generate(args.count)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
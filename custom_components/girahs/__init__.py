@@ -1,66 +1,459 @@
 import asyncio
-from attr import has
+from custom_components.girahs.capture import TelegramCapture
 from custom_components.girahs.gira import HomeServerV2
+from custom_components.girahs.helper import command_ga, create_cmd, from_ga
+from custom_components.girahs.ringbuffer import STAT_MEAN, STATISTICS
 from homeassistant import config_entries, core
-from homeassistant.const import CONF_HOST
-from homeassistant.helpers import config_validation
-from .const import DOMAIN
-
+from homeassistant.const import CONF_HOST, EVENT_HOMEASSISTANT_STOP
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation, discovery
+from homeassistant.helpers.storage import STORAGE_DIR
+from . import project, schema
+from .const import (
+    ATTR_ADDRESS,
+    ATTR_COMMAND,
+    ATTR_COMMANDS,
+    ATTR_FILE,
+    ATTR_HOST,
+    ATTR_SPEED,
+    ATTR_VALUE,
+    CONF_AGGREGATE,
+    CONF_AGGREGATE_INTERVAL,
+    CONF_AGGREGATE_SIZE,
+    CONF_AGGREGATE_STATE,
+    CONF_AGGREGATE_WINDOWS,
+    CONF_CAPTURE,
+    CONF_CAPTURE_BACKUP_COUNT,
+    CONF_CAPTURE_FILE,
+    CONF_CAPTURE_MAX_BYTES,
+    CONF_COMMAND_TIMEOUT,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_DEBOUNCE,
+    CONF_DISPATCH_BATCH_SIZE,
+    CONF_DISPATCH_OVERFLOW,
+    CONF_DISPATCH_QUEUE_SIZE,
+    CONF_EVENT,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_HEARTBEAT_TIMEOUT,
+    CONF_IO_THREAD,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_PROJECT,
+    CONF_SEND_QUEUE_SIZE,
+    CONF_SERVERS,
+    CONF_SWEEP_MIN_AGE,
+    CONF_SWEEP_TELEGRAMS_PER_MINUTE,
+    CONF_SYNC_CONCURRENCY,
+    CONF_SYNC_ON_CONNECT,
+    CONF_SYNC_TIMEOUT,
+    CONF_TELEGRAMS_PER_SECOND,
+    CONF_TRAVEL_TIME,
+    CONF_UNIQUE_ID_PREFIX,
+    CONF_VALUE_CACHE,
+    CONF_VALUE_CACHE_MAX_AGE,
+    DEFAULT_AGGREGATE_INTERVAL,
+    DEFAULT_AGGREGATE_SIZE,
+    DEFAULT_AGGREGATE_WINDOWS,
+    DEFAULT_CAPTURE_BACKUP_COUNT,
+    DEFAULT_CAPTURE_FILE,
+    DEFAULT_CAPTURE_MAX_BYTES,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_DISPATCH_BATCH_SIZE,
+    DEFAULT_DISPATCH_QUEUE_SIZE,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_HEARTBEAT_TIMEOUT,
+    DEFAULT_SEND_QUEUE_SIZE,
+    DEFAULT_SWEEP_MIN_AGE,
+    DEFAULT_SWEEP_TELEGRAMS_PER_MINUTE,
+    DEFAULT_SYNC_CONCURRENCY,
+    DEFAULT_SYNC_TIMEOUT,
+    DEFAULT_TELEGRAMS_PER_SECOND,
+    DEFAULT_VALUE_CACHE_MAX_AGE,
+    DIAGNOSTICS_FILE,
+    DOMAIN,
+    EVENT_TELEGRAM,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+    PLATFORM_READY_TIMEOUT,
+    PROJECT_CACHE_FILE,
+    SERVICE_DUMP_DIAGNOSTICS,
+    SERVICE_REPLAY_CAPTURE,
+    SERVICE_SEND_BULK,
+    VALUE_CACHE_FILE,
+)
 
-import homeassistant.components.knx.schema as sch
 
 from functools import partial
 
+import json
 import logging
+import re
 import voluptuous as vol
 import time
 import threading
+import xml.etree.ElementTree as ElementTree
+
+CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(
+            CONF_CAPTURE_FILE, default=DEFAULT_CAPTURE_FILE
+        ): config_validation.string,
+        vol.Optional(
+            CONF_CAPTURE_MAX_BYTES, default=DEFAULT_CAPTURE_MAX_BYTES
+        ): config_validation.positive_int,
+        vol.Optional(
+            CONF_CAPTURE_BACKUP_COUNT, default=DEFAULT_CAPTURE_BACKUP_COUNT
+        ): config_validation.positive_int,
+    }
+)
 
+VALUE_FILTER_SCHEMA = {
+    vol.Optional(CONF_DEADBAND): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    vol.Optional(CONF_DEADBAND_PERCENT): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    vol.Optional(CONF_MIN_INTERVAL): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    vol.Optional(CONF_MAX_INTERVAL): vol.All(vol.Coerce(float), vol.Range(min=0)),
+}
 
-CONFIG_SCHEMA = vol.Schema(
+BINARY_FILTER_SCHEMA = {
+    vol.Optional(CONF_DEBOUNCE): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    vol.Optional(CONF_MIN_INTERVAL): vol.All(vol.Coerce(float), vol.Range(min=0)),
+}
+
+AGGREGATE_SCHEMA = vol.Schema(
     {
-        DOMAIN: vol.All(
-            vol.Schema(
-                {
-                    vol.Required(CONF_HOST): config_validation.string,
-                    **sch.ClimateSchema.platform_node(),
-                    **sch.SwitchSchema.platform_node(),
-                    **sch.LightSchema.platform_node(),
-                    **sch.WeatherSchema.platform_node(),
-                    **sch.CoverSchema.platform_node(),
-                    **sch.SensorSchema.platform_node(),
-                    **sch.BinarySensorSchema.platform_node(),
-                }
-            )
-        )
-    },
+        vol.Optional(
+            CONF_AGGREGATE_WINDOWS, default=DEFAULT_AGGREGATE_WINDOWS
+        ): vol.All(
+            config_validation.ensure_list,
+            vol.Length(min=1),
+            [vol.All(vol.Coerce(float), vol.Range(min=1))],
+        ),
+        vol.Optional(CONF_AGGREGATE_STATE, default=STAT_MEAN): vol.In(STATISTICS),
+        vol.Optional(
+            CONF_AGGREGATE_INTERVAL, default=DEFAULT_AGGREGATE_INTERVAL
+        ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+        vol.Optional(CONF_AGGREGATE_SIZE, default=DEFAULT_AGGREGATE_SIZE): vol.All(
+            vol.Coerce(int), vol.Range(min=2)
+        ),
+    }
+)
+
+SENSOR_OPTIONS_SCHEMA = {
+    **VALUE_FILTER_SCHEMA,
+    vol.Optional(CONF_AGGREGATE): AGGREGATE_SCHEMA,
+}
+
+COVER_OPTIONS_SCHEMA = {
+    vol.Optional(CONF_TRAVEL_TIME): vol.All(vol.Coerce(float), vol.Range(min=1)),
+}
+
+
+SERVER_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_HOST): config_validation.string,
+        vol.Optional(CONF_UNIQUE_ID_PREFIX, default=""): config_validation.string,
+        vol.Optional(
+            CONF_DISPATCH_QUEUE_SIZE, default=DEFAULT_DISPATCH_QUEUE_SIZE
+        ): config_validation.positive_int,
+        vol.Optional(
+            CONF_DISPATCH_BATCH_SIZE, default=DEFAULT_DISPATCH_BATCH_SIZE
+        ): config_validation.positive_int,
+        vol.Optional(CONF_DISPATCH_OVERFLOW, default=OVERFLOW_DROP_OLDEST): vol.In(
+            [OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST]
+        ),
+        vol.Optional(
+            CONF_TELEGRAMS_PER_SECOND, default=DEFAULT_TELEGRAMS_PER_SECOND
+        ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+        vol.Optional(
+            CONF_SEND_QUEUE_SIZE, default=DEFAULT_SEND_QUEUE_SIZE
+        ): config_validation.positive_int,
+        vol.Optional(CONF_COMMAND_TIMEOUT, default=DEFAULT_COMMAND_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1)
+        ),
+        vol.Optional(CONF_SYNC_ON_CONNECT, default=True): config_validation.boolean,
+        vol.Optional(
+            CONF_SYNC_CONCURRENCY, default=DEFAULT_SYNC_CONCURRENCY
+        ): config_validation.positive_int,
+        vol.Optional(CONF_SYNC_TIMEOUT, default=DEFAULT_SYNC_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1)
+        ),
+        vol.Optional(
+            CONF_SWEEP_TELEGRAMS_PER_MINUTE, default=DEFAULT_SWEEP_TELEGRAMS_PER_MINUTE
+        ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(
+            CONF_SWEEP_MIN_AGE, default=DEFAULT_SWEEP_MIN_AGE
+        ): config_validation.positive_int,
+        vol.Optional(CONF_VALUE_CACHE, default=True): config_validation.boolean,
+        vol.Optional(
+            CONF_VALUE_CACHE_MAX_AGE, default=DEFAULT_VALUE_CACHE_MAX_AGE
+        ): config_validation.positive_int,
+        vol.Optional(
+            CONF_HEARTBEAT_INTERVAL, default=DEFAULT_HEARTBEAT_INTERVAL
+        ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+        vol.Optional(
+            CONF_HEARTBEAT_TIMEOUT, default=DEFAULT_HEARTBEAT_TIMEOUT
+        ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+        vol.Optional(CONF_IO_THREAD, default=False): config_validation.boolean,
+        vol.Optional(CONF_EVENT, default=[]): vol.All(
+            config_validation.ensure_list, [schema.ga_pattern_validator]
+        ),
+        vol.Optional(CONF_CAPTURE): CAPTURE_SCHEMA,
+        vol.Optional(CONF_PROJECT): config_validation.string,
+        **schema.platform_node("climate", schema.CLIMATE_SCHEMA),
+        **schema.platform_node("switch", schema.SWITCH_SCHEMA),
+        **schema.platform_node("light", schema.LIGHT_SCHEMA),
+        **schema.platform_node("weather", schema.WEATHER_SCHEMA, VALUE_FILTER_SCHEMA),
+        **schema.platform_node("cover", schema.COVER_SCHEMA, COVER_OPTIONS_SCHEMA),
+        **schema.platform_node("sensor", schema.SENSOR_SCHEMA, SENSOR_OPTIONS_SCHEMA),
+        **schema.platform_node(
+            "binary_sensor", schema.BINARY_SENSOR_SCHEMA, BINARY_FILTER_SCHEMA
+        ),
+    }
+)
+
+
+BULK_COMMAND_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ADDRESS): schema.ga_validator,
+        # Booleans are sent as 0 and 1 like the entities do.
+        vol.Required(ATTR_VALUE): vol.Any(vol.All(bool, vol.Coerce(int)), int, float),
+    }
+)
+
+
+def _server_list(data) -> list:
+    """Accept a single HomeServer configured at the top level and/or a list of
+    servers, returns the list of server configurations."""
+    if not isinstance(data, dict):
+        raise vol.Invalid("expected a dictionary")
+    data = dict(data)
+    servers = []
+    for server in data.pop(CONF_SERVERS, []):
+        if isinstance(server, dict) and CONF_HOST in server:
+            # Keep the unique ids of the entities apart between the servers.
+            server = {CONF_UNIQUE_ID_PREFIX: f"{server[CONF_HOST]}_", **server}
+        servers.append(server)
+    if data:
+        servers.insert(0, data)
+    if not servers:
+        raise vol.Invalid("at least one HomeServer needs to be configured")
+    return servers
+
+
+CONFIG_SCHEMA = vol.Schema(
+    {DOMAIN: vol.All(_server_list, [SERVER_SCHEMA])},
     extra=vol.ALLOW_EXTRA,
 )
 
 logger = logging.getLogger(__name__)
 
+PLATFORMS = [
+    "light",
+    "switch",
+    "cover",
+    "climate",
+    "weather",
+    "binary_sensor",
+    "sensor",
+]
+
+# These platforms also hold the diagnostic entities of every server.
+DIAGNOSTIC_PLATFORMS = {"binary_sensor", "sensor"}
+
 
-async def delay_connect(gira: HomeServerV2) -> None:
-    asyncio.sleep(10)
-    asyncio.create_task(gira.connect())
+def _write_file(path: str, data: str) -> None:
+    with open(path, "w") as f:
+        f.write(data)
+
+
+async def connect_when_ready(hass: core.HomeAssistant, gira: HomeServerV2) -> None:
+    """Connect once all platforms have registered their addresses, so that no
+    telegram is received for an address nobody subscribed to yet."""
+    try:
+        await asyncio.wait_for(
+            hass.data[DOMAIN]["ready"].wait(), PLATFORM_READY_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.warning(
+            "Platforms not set up after %.0fs, connecting to %s anyway",
+            PLATFORM_READY_TIMEOUT,
+            gira.host,
+        )
+    gira.set_ready()
+    await gira.connect()
+
+
+def _fire_telegram_event(hass: core.HomeAssistant, host: str, cmd: dict) -> None:
+    hass.bus.async_fire(
+        EVENT_TELEGRAM,
+        {
+            ATTR_HOST: host,
+            ATTR_ADDRESS: from_ga(cmd["ga"]),
+            ATTR_COMMAND: cmd.get("cmd"),
+            ATTR_VALUE: cmd.get("value"),
+        },
+    )
+
+
+async def stop_server(
+    hass: core.HomeAssistant, gira: HomeServerV2, event: core.Event
+) -> None:
+    """Stop the connection and its background tasks before closing the files
+    they write to."""
+    await gira.disconnect()
+    await hass.async_add_executor_job(gira.close)
+
+
+def _file_name(template: str, host: str) -> str:
+    return template.format(host=re.sub(r"[^A-Za-z0-9]+", "_", host))
+
+
+async def load_project(hass: core.HomeAssistant, conf: dict) -> dict:
+    """Add the entities generated from the project export to the configuration
+    of the server, the configured entities take precedence."""
+    path = hass.config.path(conf[CONF_PROJECT])
+    try:
+        index = await hass.async_add_executor_job(
+            project.load_index,
+            path,
+            hass.config.path(
+                STORAGE_DIR, _file_name(PROJECT_CACHE_FILE, conf[CONF_HOST])
+            ),
+        )
+    except (OSError, ElementTree.ParseError) as err:
+        logger.error("Cannot read the project export %s: %s", path, err)
+        return conf
+    return project.merge_entities(conf, project.generate_entities(index))
 
 
 async def async_setup(hass: core.HomeAssistant, config: config_entries.ConfigType):
-    logger.info("Registering Gira KNX Gateway")
-    gira = HomeServerV2(config)
-    hass.data[DOMAIN] = {"api": gira}
-
-    # Load all platforms
-    for p in [
-        "light",
-        "switch",
-        "cover",
-        "climate",
-        "weather",
-        "binary_sensor",
-        "sensor",
-    ]:
-        hass.helpers.discovery.load_platform(p, DOMAIN, {}, config)
-
-    asyncio.create_task(delay_connect(gira))
+    start = time.monotonic()
+    servers: list[HomeServerV2] = []
+    # Server configurations including the entities generated from projects.
+    configs: list[dict] = []
+    for conf in config[DOMAIN]:
+        logger.info("Registering Gira KNX Gateway %s", conf[CONF_HOST])
+        if CONF_PROJECT in conf:
+            conf = await load_project(hass, conf)
+        configs.append(conf)
+        gira = HomeServerV2(
+            conf,
+            hass.config.path(
+                STORAGE_DIR, _file_name(VALUE_CACHE_FILE, conf[CONF_HOST])
+            ),
+        )
+        # Restore the last known values before the entities are created.
+        await hass.async_add_executor_job(gira.load_cache)
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, partial(stop_server, hass, gira)
+        )
+        fire_event = partial(_fire_telegram_event, hass, gira.host)
+        for addresses in conf[CONF_EVENT]:
+            gira.subscribe_telegrams(addresses, fire_event)
+
+        capture = conf.get(CONF_CAPTURE)
+        if capture is not None:
+            gira.enable_capture(
+                TelegramCapture(
+                    hass.config.path(
+                        _file_name(capture[CONF_CAPTURE_FILE], conf[CONF_HOST])
+                    ),
+                    capture[CONF_CAPTURE_MAX_BYTES],
+                    capture[CONF_CAPTURE_BACKUP_COUNT],
+                )
+            )
+        servers.append(gira)
+
+    hass.data[DOMAIN] = {
+        "servers": servers,
+        "setup_times": {},
+        "pending_platforms": set(),
+        "ready": asyncio.Event(),
+    }
+
+    def get_server(call: core.ServiceCall) -> HomeServerV2:
+        host = call.data.get(ATTR_HOST)
+        if host is None:
+            return servers[0]
+        for gira in servers:
+            if gira.host == host:
+                return gira
+        raise HomeAssistantError(f"Unknown HomeServer {host}")
+
+    async def dump_diagnostics(call: core.ServiceCall) -> None:
+        path = hass.config.path(DIAGNOSTICS_FILE)
+        data = json.dumps(
+            {
+                "setup_times": hass.data[DOMAIN]["setup_times"],
+                "servers": [
+                    {**gira.diagnostics(), "snapshot": gira.changes_since(0)}
+                    for gira in servers
+                ],
+            },
+            indent=2,
+        )
+        await hass.async_add_executor_job(_write_file, path, data)
+        logger.info("Wrote diagnostics to %s", path)
+
+    hass.services.async_register(DOMAIN, SERVICE_DUMP_DIAGNOSTICS, dump_diagnostics)
+
+    async def replay(call: core.ServiceCall) -> None:
+        await get_server(call).replay(
+            hass.config.path(call.data[ATTR_FILE]), call.data[ATTR_SPEED]
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REPLAY_CAPTURE,
+        replay,
+        schema=vol.Schema(
+            {
+                vol.Required(ATTR_FILE): config_validation.string,
+                vol.Optional(ATTR_SPEED, default=1.0): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+                vol.Optional(ATTR_HOST): config_validation.string,
+            }
+        ),
+    )
+
+    async def send_bulk(call: core.ServiceCall) -> None:
+        await get_server(call).send_bulk(
+            [
+                create_cmd(command_ga(c[ATTR_ADDRESS]), c[ATTR_VALUE])
+                for c in call.data[ATTR_COMMANDS]
+            ]
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_BULK,
+        send_bulk,
+        schema=vol.Schema(
+            {
+                vol.Required(ATTR_COMMANDS): vol.All(
+                    config_validation.ensure_list, [BULK_COMMAND_SCHEMA]
+                ),
+                vol.Optional(ATTR_HOST): config_validation.string,
+            }
+        ),
+    )
+
+    # Load the platforms that have entities configured
+    for p in PLATFORMS:
+        if p not in DIAGNOSTIC_PLATFORMS and not any(c.get(p) for c in configs):
+            logger.debug("Skipping platform %s without entities", p)
+            continue
+        hass.data[DOMAIN]["pending_platforms"].add(p)
+        hass.async_create_task(
+            discovery.async_load_platform(hass, p, DOMAIN, {}, config)
+        )
+
+    for gira in servers:
+        asyncio.create_task(connect_when_ready(hass, gira))
+
+    elapsed = time.monotonic() - start
+    hass.data[DOMAIN]["setup_times"]["setup"] = elapsed
+    logger.debug("Set up %d HomeServer(s) in %.3fs", len(servers), elapsed)
     return True
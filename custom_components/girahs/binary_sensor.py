@@ -1,32 +1,41 @@
 import logging
+import time
 import typing
+from custom_components.girahs import dpt
 from custom_components.girahs.entity import GiraEntity
 
 from homeassistant import core
 from homeassistant import config_entries
 from homeassistant.components import binary_sensor
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import DiscoveryInfoType
 
-from .const import DOMAIN
+from .const import DOMAIN, STATE_CONNECTED
 from .gira import HomeServerV2
+from .helper import platform_setup_done
 
 logger = logging.getLogger(__name__)
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: core.HomeAssistant,
     config: config_entries.ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: typing.Optional[DiscoveryInfoType] = None,
 ) -> None:
+    start = time.monotonic()
     logger.info("Setting up binary sensor")
-    api: HomeServerV2 = hass.data[DOMAIN]["api"]
+    servers: list[HomeServerV2] = hass.data[DOMAIN]["servers"]
 
-    entities = [HomeServerBinarySensor(l, api) for l in api.binary_sensors]
+    entities = [
+        HomeServerBinarySensor(l, api) for api in servers for l in api.binary_sensors
+    ]
+    entities.extend(HomeServerConnectionSensor(api) for api in servers)
 
     # Add the entities to Home Asssitant
-    add_entities(entities)
+    async_add_entities(entities)
+    platform_setup_done(hass, "binary_sensor", len(entities), start)
 
 
 class HomeServerBinarySensor(GiraEntity, binary_sensor.BinarySensorEntity):
@@ -38,12 +47,34 @@ class HomeServerBinarySensor(GiraEntity, binary_sensor.BinarySensorEntity):
         self._attr_address = data["state_address"][0]
         self._attr_device_class = data["device_class"]
 
-        self._attr_api.add_entity(self._attr_address, self)
+        self.bind(self._attr_address, "_attr_is_on", dpt.boolean)
 
-    async def handle_cmd(self, cmd: dict) -> None:
-        val = cmd["value"]
-        if val != self._attr_is_on:
-            self._attr_is_on = val
-            if self.hass is None:
-                return
-            self.schedule_update_ha_state()
+
+class HomeServerConnectionSensor(binary_sensor.BinarySensorEntity):
+    """Reports whether the websocket connection to the HomeServer is up."""
+
+    def __init__(self, api: "HomeServerV2") -> None:
+        super().__init__()
+        self._attr_api = api
+        self._attr_name = f"Gira HomeServer {api.host}"
+        self._attr_unique_id = f"{api.host}_connection"
+        self._attr_device_class = binary_sensor.DEVICE_CLASS_CONNECTIVITY
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_should_poll = False
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            self._attr_api.add_connection_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def is_on(self) -> bool:
+        return self._attr_api.connection_state == STATE_CONNECTED
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        return {
+            "state": self._attr_api.connection_state,
+            "latency": self._attr_api.latency,
+            "reconnects": self._attr_api.reconnects,
+        }
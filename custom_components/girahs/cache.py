@@ -0,0 +1,82 @@
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Any, Optional
+
+try:
+    from .const import GA_COUNT
+except ImportError:
+    from const import GA_COUNT
+
+logger = logging.getLogger(__name__)
+
+# The file starts with a magic header followed by one fixed-size record per
+# possible group address: (timestamp, value). A timestamp of 0 marks an empty slot.
+MAGIC = b"GIRAHSV1"
+RECORD = struct.Struct("<dd")
+FILE_SIZE = len(MAGIC) + GA_COUNT * RECORD.size
+
+
+class ValueCache(object):
+    """Memory mapped on-disk cache of the last value per group address.
+
+    Writes only touch the mapped memory, the operating system persists the
+    pages in the background and on close."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._mmap: Optional[mmap.mmap] = None
+
+    def open(self) -> None:
+        """Open or create the cache file, blocking, run it in the executor."""
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != FILE_SIZE:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, FILE_SIZE)
+            self._mmap = mmap.mmap(fd, FILE_SIZE)
+        finally:
+            os.close(fd)
+
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            logger.info("Initializing value cache %s", self._path)
+            self._mmap[:] = bytes(FILE_SIZE)
+            self._mmap[: len(MAGIC)] = MAGIC
+
+    def close(self) -> None:
+        if self._mmap is None:
+            return
+        self._mmap.flush()
+        self._mmap.close()
+        self._mmap = None
+
+    def get(self, ga: int, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the cached value or None if there is none or it is older than
+        max_age seconds."""
+        if self._mmap is None:
+            return None
+        timestamp, value = RECORD.unpack_from(self._mmap, len(MAGIC) + ga * RECORD.size)
+        if timestamp == 0:
+            return None
+        if max_age is not None and time.time() - timestamp > max_age:
+            return None
+        return int(value) if value.is_integer() else value
+
+    def timestamp(self, ga: int) -> Optional[float]:
+        if self._mmap is None:
+            return None
+        timestamp, _ = RECORD.unpack_from(self._mmap, len(MAGIC) + ga * RECORD.size)
+        return timestamp or None
+
+    def set(self, ga: int, value: Any, timestamp: Optional[float] = None) -> None:
+        if self._mmap is None or not isinstance(value, (int, float)):
+            return
+        RECORD.pack_into(
+            self._mmap,
+            len(MAGIC) + ga * RECORD.size,
+            timestamp or time.time(),
+            value,
+        )
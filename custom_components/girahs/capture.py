@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Every capture file starts with a magic header followed by fixed-size records:
+# (unix timestamp, group address, command type, value).
+MAGIC = b"GIRACAP1"
+RECORD = struct.Struct("<dHBd")
+
+# Frames replayed back to back before yielding to the event loop, and the time
+# to wait while the dispatcher is congested.
+REPLAY_YIELD_FRAMES = 100
+REPLAY_CONGESTED_DELAY = 0.01
+
+
+class TelegramCapture(object):
+    """Records the inbound frames into a compact binary log with rotation.
+
+    Recording only appends to an in-memory buffer, writing the buffer to disk
+    is blocking and done by the caller in the executor. Frames may be recorded
+    from the I/O thread of the connection."""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int) -> None:
+        self._path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        # A flush still running in the executor may overlap with close.
+        self._file_lock = threading.Lock()
+        self._file = None
+
+    def record(self, cmd: dict) -> None:
+        value = cmd.get("value")
+        if not isinstance(value, (int, float)):
+            return
+        try:
+            record = RECORD.pack(time.time(), int(cmd["ga"]), cmd["cmd"], value)
+        except (KeyError, TypeError, ValueError, struct.error):
+            return
+        with self._lock:
+            self._buffer += record
+
+    def take(self) -> bytes:
+        with self._lock:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        return data
+
+    def write(self, data: bytes) -> None:
+        """Append the data to the capture file, rotating it when it is full."""
+        if not data:
+            return
+        with self._file_lock:
+            self._write(data)
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None:
+            self._file = open(self._path, "ab")
+            if self._file.tell() == 0:
+                self._file.write(MAGIC)
+        self._file.write(data)
+        self._file.flush()
+        if self._file.tell() >= self._max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        for i in range(self._backup_count - 1, 0, -1):
+            source = f"{self._path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self._path}.{i + 1}")
+        if self._backup_count > 0:
+            os.replace(self._path, f"{self._path}.1")
+        else:
+            os.remove(self._path)
+
+    def close(self) -> None:
+        data = self.take()
+        with self._file_lock:
+            if data:
+                self._write(data)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_capture(path: str) -> Iterator[tuple[float, int, int, float]]:
+    """Iterate over the (timestamp, ga, cmd, value) records of a capture file."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a telegram capture")
+        data = f.read()
+    usable = len(data) - len(data) % RECORD.size
+    yield from RECORD.iter_unpack(data[:usable])
+
+
+async def replay_capture(
+    path: str,
+    handler: Callable[[dict, Optional[float]], None],
+    speed: float = 1.0,
+    congested: Optional[Callable[[], bool]] = None,
+) -> int:
+    """Feed the frames of a capture file into handler.
+
+    The original spacing of the frames is divided by speed, a speed of 0 replays
+    as fast as possible. The replay yields to the event loop every few frames
+    and waits while congested returns True, so that a storm is not replayed
+    faster than it can be dispatched. Returns the number of replayed frames."""
+    loop = asyncio.get_running_loop()
+    records = await loop.run_in_executor(None, lambda: list(read_capture(path)))
+    if not records:
+        return 0
+
+    first = records[0][0]
+    start = loop.time()
+    for i, (timestamp, ga, cmd, value) in enumerate(records):
+        delay = start + (timestamp - first) / speed - loop.time() if speed > 0 else 0
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif i % REPLAY_YIELD_FRAMES == 0:
+            await asyncio.sleep(0)
+        while congested is not None and congested():
+            await asyncio.sleep(REPLAY_CONGESTED_DELAY)
+        if value.is_integer():
+            value = int(value)
+        handler({"cmd": cmd, "ga": ga, "value": value}, time.monotonic())
+    logger.info("Replayed %d frames from %s", len(records), path)
+    return len(records)
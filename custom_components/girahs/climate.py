@@ -1,5 +1,6 @@
 from datetime import timedelta
 import logging
+import time
 from os import name
 import typing
 from custom_components.girahs.entity import GiraEntity
@@ -19,23 +20,26 @@ from homeassistant.helpers.typing import DiscoveryInfoType
 
 from .const import DOMAIN
 from .gira import HomeServerV2
+from .helper import platform_setup_done
 
 logger = logging.getLogger(__name__)
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: core.HomeAssistant,
     config: config_entries.ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: typing.Optional[DiscoveryInfoType] = None,
 ) -> None:
+    start = time.monotonic()
     logger.debug("Setting up climate")
-    api: HomeServerV2 = hass.data[DOMAIN]["api"]
+    servers: list[HomeServerV2] = hass.data[DOMAIN]["servers"]
 
-    accs = [HomeServerClimate(l, api) for l in api.climates]
+    accs = [HomeServerClimate(l, api) for api in servers for l in api.climates]
 
     # Add the entities to Home Asssitant
-    add_entities(accs)
+    async_add_entities(accs)
+    platform_setup_done(hass, "climate", len(accs), start)
 
 
 class HomeServerClimate(GiraEntity, ClimateEntity):
@@ -54,31 +58,10 @@ class HomeServerClimate(GiraEntity, ClimateEntity):
         self._attr_supported_features = SUPPORT_TARGET_TEMPERATURE
 
         # Register update handler
-        self._attr_api.add_entity(self._attr_temperature_address, self)
-        self._attr_api.add_entity(self._attr_target_temperature_state_address, self)
-
-    def should_poll(self) -> bool:
-        return False
-
-    async def handle_cmd(self, cmd: dict) -> None:
-        """This method is called for all registered state addresses that should be
-        observed"""
-        val = cmd["value"]
-        a = cmd["address"]
-
-        if (
-            a == self._attr_temperature_address
-            and val != self._attr_current_temperature
-        ):
-            self._attr_current_temperature = val
-            self.schedule_update_ha_state()
-
-        if (
-            a == self._attr_target_temperature_state_address
-            and val != self._attr_target_temperature
-        ):
-            self._attr_target_temperature = val
-            self.schedule_update_ha_state()
+        self.bind(self._attr_temperature_address, "_attr_current_temperature")
+        self.bind(
+            self._attr_target_temperature_state_address, "_attr_target_temperature"
+        )
 
     async def async_set_temperature(self, **kwargs):
         """Set new target temperature."""
@@ -0,0 +1,54 @@
+"""JSON codec for the frames exchanged with the HomeServer.
+
+orjson is used when installed (it ships with Home Assistant), the standard
+library json module otherwise. Outbound frames are built from pre-serialized
+prefixes per command type and group address."""
+
+import json
+from typing import Any
+
+try:
+    from .const import CMD_WRITE
+except ImportError:
+    from const import CMD_WRITE
+
+try:
+    import orjson
+
+    NAME = "orjson"
+
+    def loads(data: Any) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    NAME = "json"
+    loads = json.loads
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+    dumps = _encoder.encode
+
+
+# Serialized frame prefix per (command type, group address).
+_prefixes: dict[tuple[int, int], str] = {}
+
+
+def compile_frame(ga: int, type: int = CMD_WRITE) -> str:
+    """Return the serialized frame up to the value for the address."""
+    key = (type, ga)
+    prefix = _prefixes.get(key)
+    if prefix is None:
+        prefix = _prefixes[key] = f'{{"cmd":{type},"ga":{ga},"value":'
+    return prefix
+
+
+def encode_command(cmd: dict) -> str:
+    """Serialize a command in the form of {cmd: type, ga: address, value: val}."""
+    value = cmd["value"]
+    prefix = _prefixes.get((cmd["cmd"], cmd["ga"]))
+    if prefix is None:
+        prefix = compile_frame(cmd["ga"], cmd["cmd"])
+    if type(value) is int:
+        return f"{prefix}{value}}}"
+    return f"{prefix}{dumps(value)}}}"
@@ -1,2 +1,156 @@
 DEFAULT_HOST = "192.168.178.5"
 DOMAIN = "girahs"
+
+# KNX group addresses are 16 bit wide (5 bit main, 3 bit middle, 8 bit sub group),
+# per-address tables have one slot per possible address.
+GA_COUNT = 1 << 16
+
+# Command types used in the frames exchanged with the HomeServer.
+CMD_WRITE = 1
+CMD_STEP = 2
+
+# Inbound dispatcher
+CONF_DISPATCH_QUEUE_SIZE = "dispatch_queue_size"
+CONF_DISPATCH_BATCH_SIZE = "dispatch_batch_size"
+CONF_DISPATCH_OVERFLOW = "dispatch_overflow"
+
+DEFAULT_DISPATCH_QUEUE_SIZE = 10000
+DEFAULT_DISPATCH_BATCH_SIZE = 500
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+
+# Outbound command scheduler
+CONF_TELEGRAMS_PER_SECOND = "telegrams_per_second"
+CONF_SEND_QUEUE_SIZE = "send_queue_size"
+
+# A KNX TP1 line carries roughly 40-50 telegrams per second, leave some headroom
+# for the traffic of the other bus devices.
+DEFAULT_TELEGRAMS_PER_SECOND = 20
+DEFAULT_SEND_QUEUE_SIZE = 1000
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Optimistic state of a command is rolled back when the status address does not
+# confirm it within the timeout.
+CONF_COMMAND_TIMEOUT = "command_timeout"
+
+DEFAULT_COMMAND_TIMEOUT = 5.0
+
+# State synchronization after connecting
+CMD_READ = 3
+
+CONF_SYNC_ON_CONNECT = "sync_on_connect"
+CONF_SYNC_CONCURRENCY = "sync_concurrency"
+CONF_SYNC_TIMEOUT = "sync_timeout"
+
+DEFAULT_SYNC_CONCURRENCY = 10
+DEFAULT_SYNC_TIMEOUT = 5.0
+
+# Background re-reads of the subscribed addresses, oldest values first.
+CONF_SWEEP_TELEGRAMS_PER_MINUTE = "sweep_telegrams_per_minute"
+CONF_SWEEP_MIN_AGE = "sweep_min_age"
+
+DEFAULT_SWEEP_TELEGRAMS_PER_MINUTE = 6
+DEFAULT_SWEEP_MIN_AGE = 3600
+# The sweeper pauses while the inbound rate exceeds this fraction of the
+# telegrams per second configured for sending, or commands are queued.
+SWEEP_BUSY_FRACTION = 0.5
+SWEEP_MAX_BACKOFF = 16
+
+# Persistent value cache
+CONF_VALUE_CACHE = "value_cache"
+CONF_VALUE_CACHE_MAX_AGE = "value_cache_max_age"
+
+VALUE_CACHE_FILE = "girahs_values_{host}.bin"
+DEFAULT_VALUE_CACHE_MAX_AGE = 24 * 3600
+
+# Connection management
+CONF_HEARTBEAT_INTERVAL = "heartbeat_interval"
+CONF_HEARTBEAT_TIMEOUT = "heartbeat_timeout"
+
+DEFAULT_HEARTBEAT_INTERVAL = 30.0
+DEFAULT_HEARTBEAT_TIMEOUT = 10.0
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED = "connected"
+STATE_DISCONNECTED = "disconnected"
+
+# Raw telegrams of the group addresses matching the configured patterns are
+# fired as Home Assistant events, whether an entity subscribed to them or not.
+CONF_EVENT = "event"
+EVENT_TELEGRAM = "girahs_telegram"
+ATTR_COMMAND = "command"
+
+# Run the connection, decoding and coalescing in a separate thread.
+CONF_IO_THREAD = "io_thread"
+
+# Startup, the connection is established once all platforms registered their
+# addresses. Frames received before the entities are attached to Home Assistant
+# are buffered and replayed when they are.
+PLATFORM_READY_TIMEOUT = 30.0
+EARLY_BUFFER_SIZE = 10000
+EARLY_BUFFER_TIMEOUT = 30.0
+
+# Services
+SERVICE_DUMP_DIAGNOSTICS = "dump_diagnostics"
+DIAGNOSTICS_FILE = "girahs_diagnostics.json"
+
+# Telegram capture
+CONF_CAPTURE = "capture"
+CONF_CAPTURE_FILE = "file"
+CONF_CAPTURE_MAX_BYTES = "max_bytes"
+CONF_CAPTURE_BACKUP_COUNT = "backup_count"
+
+DEFAULT_CAPTURE_FILE = "girahs_capture_{host}.bin"
+DEFAULT_CAPTURE_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_CAPTURE_BACKUP_COUNT = 5
+CAPTURE_FLUSH_INTERVAL = 5.0
+
+SERVICE_REPLAY_CAPTURE = "replay_capture"
+ATTR_FILE = "file"
+ATTR_SPEED = "speed"
+
+# Per-entity value filters
+CONF_DEADBAND = "deadband"
+CONF_DEADBAND_PERCENT = "deadband_percent"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_INTERVAL = "max_interval"
+CONF_DEBOUNCE = "debounce"
+
+# Cover travel model, the position is estimated while moving and written at
+# most once per update interval.
+CONF_TRAVEL_TIME = "travel_time"
+
+COVER_UPDATE_INTERVAL = 1.0
+
+# Sensor aggregates, the samples are kept in a ring buffer and the statistics
+# over the windows are written once per interval instead of every sample.
+CONF_AGGREGATE = "aggregate"
+CONF_AGGREGATE_WINDOWS = "windows"
+CONF_AGGREGATE_STATE = "state"
+CONF_AGGREGATE_INTERVAL = "interval"
+CONF_AGGREGATE_SIZE = "size"
+
+DEFAULT_AGGREGATE_WINDOWS = [60]
+DEFAULT_AGGREGATE_INTERVAL = 60
+DEFAULT_AGGREGATE_SIZE = 1024
+
+# Entities generated from a project export, the parsed index of the export is
+# cached and only parsed again when the file changed.
+CONF_PROJECT = "project"
+PROJECT_CACHE_FILE = "girahs_project_{host}.json"
+
+# Multiple HomeServers
+CONF_SERVERS = "servers"
+CONF_UNIQUE_ID_PREFIX = "unique_id_prefix"
+ATTR_HOST = "host"
+
+# Bulk writes
+SERVICE_SEND_BULK = "send_bulk"
+ATTR_COMMANDS = "commands"
+ATTR_ADDRESS = "address"
+ATTR_VALUE = "value"
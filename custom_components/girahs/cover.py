@@ -1,10 +1,19 @@
 import asyncio
 from datetime import timedelta
 import logging
+import time
 from os import name
 import typing
 from custom_components.girahs.entity import GiraEntity
-from custom_components.girahs.helper import create_cmd, to_ga, to_gira_pct, to_hass_byte
+from custom_components.girahs.travel import TravelModel
+from custom_components.girahs.helper import (
+    command_ga,
+    create_cmd,
+    platform_setup_done,
+    to_ga,
+    to_gira_pct,
+    to_hass_byte,
+)
 
 from homeassistant import core
 from homeassistant import config_entries
@@ -22,24 +31,26 @@ from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import DiscoveryInfoType
 
-from .const import DOMAIN
+from .const import CONF_TRAVEL_TIME, COVER_UPDATE_INTERVAL, DOMAIN
 from .gira import HomeServerV2
 
 logger = logging.getLogger(__name__)
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: core.HomeAssistant,
     config: config_entries.ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: typing.Optional[DiscoveryInfoType] = None,
 ) -> None:
+    start = time.monotonic()
     logger.debug("Setting up cover")
-    api: HomeServerV2 = hass.data[DOMAIN]["api"]
-    covers = [HomeServerCover(l, api) for l in api.covers]
+    servers: list[HomeServerV2] = hass.data[DOMAIN]["servers"]
+    covers = [HomeServerCover(l, api) for api in servers for l in api.covers]
 
     # Add the entities to Home Asssitant
-    add_entities(covers)
+    async_add_entities(covers)
+    platform_setup_done(hass, "cover", len(covers), start)
 
 
 class HomeServerCover(GiraEntity, CoverEntity):
@@ -52,6 +63,9 @@ class HomeServerCover(GiraEntity, CoverEntity):
         self._attr_move_short_address = cover["move_short_address"][0]
         self._attr_position_address = cover["position_address"][0]
         self._attr_stop_address = cover["stop_address"][0]
+        self._attr_move_long_address_ga = command_ga(self._attr_move_long_address)
+        self._attr_position_address_ga = command_ga(self._attr_position_address)
+        self._attr_stop_address_ga = command_ga(self._attr_stop_address)
 
         # Setup device class and supported features
         # Setting "is_closed" to False will avoid issues when setting the position in a scene.
@@ -61,40 +75,106 @@ class HomeServerCover(GiraEntity, CoverEntity):
             SUPPORT_OPEN | SUPPORT_CLOSE | SUPPORT_STOP | SUPPORT_SET_POSITION
         )
 
+        # Estimate the position while moving if the travel time is known.
+        self._attr_travel = (
+            TravelModel(cover[CONF_TRAVEL_TIME]) if CONF_TRAVEL_TIME in cover else None
+        )
+        self._attr_travel_timer: typing.Optional[asyncio.TimerHandle] = None
+
         # Register for updates
         api.add_entity(cover["position_state_address"][0], self)
 
-    def should_poll(self) -> bool:
-        return False
+    def _set_position(self, position: int) -> None:
+        self._attr_current_cover_position = position
+        self._attr_is_closed = position >= 100
 
-    async def handle_cmd(self, cmd: dict) -> None:
+    def handle_cmd(self, cmd: dict) -> bool:
         """This method is called for all registered state addresses that should be
         observed"""
         val = cmd["value"]
+        dirty = False
+        travel = self._attr_travel
+        if travel is not None and travel.moving:
+            # Reconcile the estimate with the reported position.
+            if val == travel.target:
+                self._stop_travel()
+                dirty = True
+            else:
+                travel.start(val, travel.target, time.monotonic())
         if val != self._attr_current_cover_position:
             logger.info("Updating state for %s", self._attr_position_address)
-            self._attr_current_cover_position = val
-            if self._attr_current_cover_position < 100:
-                self._attr_is_closed = False
-            else:
-                self._attr_is_closed = True
-            if self.hass is None:
-                return
-            self.schedule_update_ha_state()
+            self._set_position(val)
+            dirty = True
+        return dirty
+
+    def _start_travel(self, target: int) -> None:
+        travel = self._attr_travel
+        position = self._attr_current_cover_position
+        if travel is None or position is None or position == target:
+            return
+        travel.start(position, target, time.monotonic())
+        self._attr_is_opening = target < position
+        self._attr_is_closing = target > position
+        if self.hass is None:
+            return
+        # Show the cover as moving right away, the entity does not poll.
+        self.async_write_ha_state()
+        if self._attr_travel_timer is None:
+            self._attr_travel_timer = self.hass.loop.call_later(
+                COVER_UPDATE_INTERVAL, self._travel_update
+            )
+
+    def _stop_travel(self) -> None:
+        if self._attr_travel.moving:
+            self._set_position(round(self._attr_travel.stop(time.monotonic())))
+        self._attr_is_opening = False
+        self._attr_is_closing = False
+        if self._attr_travel_timer is not None:
+            self._attr_travel_timer.cancel()
+            self._attr_travel_timer = None
+
+    def _travel_update(self) -> None:
+        """Write the estimated position, at most once per update interval."""
+        self._attr_travel_timer = None
+        travel = self._attr_travel
+        if not travel.moving:
+            return
+        position = round(travel.position(time.monotonic()))
+        if position == travel.target:
+            # The actuator reports the final position, keep the estimate until then.
+            self._stop_travel()
+        else:
+            self._attr_travel_timer = self.hass.loop.call_later(
+                COVER_UPDATE_INTERVAL, self._travel_update
+            )
+        self._set_position(position)
+        self.async_write_ha_state()
 
     async def async_open_cover(self, **kwargs):
-        cmd = create_cmd(to_ga(self._attr_move_long_address), -1)
-        asyncio.create_task(self._attr_api.send_command(cmd))
+        cmd = create_cmd(self._attr_move_long_address_ga, -1)
+        self._attr_api.send_command(cmd)
+        self._start_travel(0)
 
     async def async_close_cover(self, **kwargs):
-        cmd = create_cmd(to_ga(self._attr_move_long_address), 1)
-        asyncio.create_task(self._attr_api.send_command(cmd))
+        cmd = create_cmd(self._attr_move_long_address_ga, 1)
+        self._attr_api.send_command(cmd)
+        self._start_travel(100)
 
     async def async_set_cover_position(self, **kwargs):
         val = kwargs[ATTR_POSITION]
-        cmd = create_cmd(to_ga(self._attr_position_address), val)
-        asyncio.create_task(self._attr_api.send_command(cmd))
+        cmd = create_cmd(self._attr_position_address_ga, val)
+        self._attr_api.send_command(cmd)
+        self._start_travel(val)
 
     async def async_stop_cover(self, **kwargs):
-        cmd = create_cmd(to_ga(self._attr_stop_address), 0)
-        asyncio.create_task(self._attr_api.send_command(cmd))
+        cmd = create_cmd(self._attr_stop_address_ga, 0)
+        self._attr_api.send_command(cmd)
+        if self._attr_travel is not None:
+            self._stop_travel()
+            if self.hass is not None:
+                self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        if self._attr_travel is not None:
+            self._stop_travel()
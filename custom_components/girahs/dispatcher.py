@@ -0,0 +1,95 @@
+import asyncio
+import collections
+import logging
+from typing import Callable
+
+try:
+    from .const import CMD_WRITE, OVERFLOW_DROP_NEWEST
+except ImportError:
+    from const import CMD_WRITE, OVERFLOW_DROP_NEWEST
+
+logger = logging.getLogger(__name__)
+
+
+class InboundDispatcher(object):
+    """Bounded queue between the websocket reader and the entities.
+
+    Received frames are drained in micro batches. Within a batch, writes to the
+    same group address collapse to the latest value, so a storm of updates for
+    one address is only applied once. When the queue is full, either the oldest
+    or the newest frame is dropped depending on the overflow policy."""
+
+    def __init__(
+        self,
+        handler: Callable[[list[dict]], None],
+        max_size: int,
+        batch_size: int,
+        overflow: str,
+    ) -> None:
+        self._handler = handler
+        self._max_size = max_size
+        self._batch_size = batch_size
+        self._overflow = overflow
+        self._queue: collections.deque[dict] = collections.deque()
+        self._wakeup = asyncio.Event()
+
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def congested(self) -> bool:
+        """Whether the queue is half full, producers that can wait should."""
+        return len(self._queue) >= self._max_size // 2
+
+    def put(self, cmd: dict) -> None:
+        """Enqueue a frame whose "ga" has already been converted to an int."""
+        if len(self._queue) >= self._max_size:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(
+                    "Inbound queue full (%d frames), dropped %d frames so far",
+                    self._max_size,
+                    self.dropped,
+                )
+            if self._overflow == OVERFLOW_DROP_NEWEST:
+                return
+            self._queue.popleft()
+        self._queue.append(cmd)
+        self._wakeup.set()
+
+    def _take_batch(self) -> list[dict]:
+        batch: list[dict] = []
+        # Position of the pending write per group address in the batch.
+        latest: dict[int, int] = {}
+        queue = self._queue
+        for _ in range(min(self._batch_size, len(queue))):
+            cmd = queue.popleft()
+            ga = cmd["ga"]
+            if cmd.get("cmd") == CMD_WRITE:
+                pos = latest.get(ga)
+                if pos is not None:
+                    batch[pos] = cmd
+                    self.coalesced += 1
+                    continue
+                latest[ga] = len(batch)
+            else:
+                # Relative commands must be applied in order, later writes
+                # cannot be merged across them.
+                latest.pop(ga, None)
+            batch.append(cmd)
+        return batch
+
+    async def run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            while self._queue:
+                try:
+                    self._handler(self._take_batch())
+                except Exception:
+                    logger.exception("Failed to dispatch inbound batch")
+                # Give the reader and Home Assistant a chance to run between batches.
+                await asyncio.sleep(0)
+            self._wakeup.clear()
@@ -0,0 +1,36 @@
+"""Conversions between the values of KNX datapoint types as sent by the HomeServer
+and the units of the Home Assistant entities.
+
+The entities bind a converter per status address once at setup, see
+GiraEntity.bind."""
+
+from typing import Any
+
+
+def identity(value: Any) -> Any:
+    return value
+
+
+def boolean(value: Any) -> bool:
+    """DPT 1.xxx switch, 0 or 1."""
+    return bool(value)
+
+
+def percent_to_byte(value: float) -> int:
+    """DPT 5.001 percentage 0..100 to the 0..255 scale of brightness."""
+    return max(0, min(255, round(value * 255 / 100)))
+
+
+def byte_to_percent(value: float) -> int:
+    """The 0..255 scale of brightness to a DPT 5.001 percentage 0..100."""
+    return max(0, min(100, round(value * 100 / 255)))
+
+
+def pa_to_hpa(value: float) -> float:
+    """DPT 9.006 pressure in Pa to hPa."""
+    return value / 100
+
+
+def ms_to_kmh(value: float) -> float:
+    """DPT 9.005 speed in m/s to km/h."""
+    return value * 3.6
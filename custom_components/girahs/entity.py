@@ -1,6 +1,11 @@
-from typing import Optional
+import time
+from functools import partial
+from typing import Any, Callable, Optional
 from homeassistant.helpers import entity
 
+from custom_components.girahs import dpt
+from custom_components.girahs.filters import ValueFilter
+
 
 class GiraEntity(entity.Entity):
     def __init__(self, data: dict, api: "HomeServerV2") -> None:
@@ -12,5 +17,149 @@ class GiraEntity(entity.Entity):
         self._attr_api = api
         self._attr_name = data["name"]
 
-    async def handle_cmd(self, cmd: dict) -> None:
+        # Filter configured for the entity, copied for every filtered value.
+        self._attr_filter = ValueFilter.from_config(data)
+        self._attr_filters: dict[str, ValueFilter] = {}
+
+        # State changes are pushed by the HomeServer.
+        self._attr_should_poll = False
+
+    @property
+    def unique_id(self) -> Optional[str]:
+        # Entities of additional HomeServers are prefixed to keep the ids unique.
+        if self._attr_unique_id is None:
+            return None
+        return self._attr_api.unique_id_prefix + self._attr_unique_id
+
+    def handle_cmd(self, cmd: dict) -> bool:
+        """Apply a received value of an address subscribed without a handler,
+        returns True if the state needs to be written."""
         raise NotImplementedError("Not implemented")
+
+    def bind(
+        self,
+        address: Optional[str],
+        attr: str,
+        converter: Callable[[Any], Any] = dpt.identity,
+    ) -> None:
+        """Apply the values received for address to attr, converted by converter."""
+        self._bind(
+            address, attr, converter, partial(getattr, self, attr), self.setter(attr)
+        )
+
+    def bind_state_attribute(
+        self,
+        address: Optional[str],
+        name: str,
+        converter: Callable[[Any], Any] = dpt.identity,
+    ) -> None:
+        """Apply the values received for address to the extra state attribute
+        name, converted by converter."""
+        if getattr(self, "_attr_extra_state_attributes", None) is None:
+            self._attr_extra_state_attributes = {}
+        attributes = self._attr_extra_state_attributes
+        self._bind(
+            address,
+            name,
+            converter,
+            partial(attributes.get, name),
+            partial(attributes.__setitem__, name),
+        )
+
+    def _bind(
+        self,
+        address: Optional[str],
+        key: str,
+        converter: Callable[[Any], Any],
+        current: Callable[[], Any],
+        apply: Callable[[Any], None],
+    ) -> None:
+        filter_value = self.filter_value
+
+        def handle(cmd: dict) -> bool:
+            return filter_value(key, converter(cmd["value"]), current(), apply)
+
+        self._attr_api.add_entity(address, self, handle)
+
+    def filter_value(
+        self, key: str, value: Any, current: Any, apply: Callable[[Any], None]
+    ) -> bool:
+        """Apply the value through the filter of the entity.
+
+        key identifies the filtered value for entities with several values. Returns
+        True if the value was applied, held back values are applied and written
+        later by a timer. Without a filter, values equal to current are ignored."""
+        if self._attr_filter is None:
+            if value == current:
+                return False
+            apply(value)
+            return True
+
+        value_filter = self._attr_filters.get(key)
+        if value_filter is None:
+            value_filter = self._attr_filters[key] = self._attr_filter.copy()
+
+        now = time.monotonic()
+        delay = value_filter.check(value, now)
+        if delay is not None and delay > 0:
+            value_filter.pending = (value, apply)
+            if value_filter.timer is None and self.hass is not None:
+                value_filter.timer = self.hass.loop.call_later(
+                    delay, self._flush_filter, key
+                )
+            return False
+
+        value_filter.pending = None
+        if value_filter.timer is not None:
+            value_filter.timer.cancel()
+            value_filter.timer = None
+        if delay is None:
+            return False
+        value_filter.written(value, now)
+        apply(value)
+        return True
+
+    def send_optimistic(
+        self, cmd: dict, status_address: str, expected: Any, attr: str, value: Any
+    ) -> None:
+        """Send the command and apply value to attr right away.
+
+        expected is the value the status address reports once the command took
+        effect, None accepts any. Without a confirmation in time, attr is rolled
+        back to its previous value."""
+        previous = getattr(self, attr)
+        setattr(self, attr, value)
+        # The entity does not poll, Home Assistant does not write the state after
+        # the service call. The confirming echo is suppressed, so write it now.
+        if self.hass is not None:
+            self.async_write_ha_state()
+        self._attr_api.send_command(cmd)
+        self._attr_api.expect_confirmation(
+            status_address, expected, self, partial(self._rollback, attr, previous)
+        )
+
+    def _rollback(self, attr: str, previous: Any) -> None:
+        setattr(self, attr, previous)
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    def setter(self, attr: str) -> Callable[[Any], None]:
+        return partial(setattr, self, attr)
+
+    def _flush_filter(self, key: str) -> None:
+        value_filter = self._attr_filters[key]
+        value_filter.timer = None
+        if value_filter.pending is None:
+            return
+        value, apply = value_filter.pending
+        if self.filter_value(key, value, None, apply) and self.hass is not None:
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        self._attr_api.entity_attached(self)
+
+    async def async_will_remove_from_hass(self) -> None:
+        for value_filter in self._attr_filters.values():
+            if value_filter.timer is not None:
+                value_filter.timer.cancel()
+                value_filter.timer = None
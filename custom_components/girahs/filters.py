@@ -0,0 +1,117 @@
+import asyncio
+from typing import Any, Callable, Optional
+
+try:
+    from .const import (
+        CONF_DEADBAND,
+        CONF_DEADBAND_PERCENT,
+        CONF_DEBOUNCE,
+        CONF_MAX_INTERVAL,
+        CONF_MIN_INTERVAL,
+    )
+except ImportError:
+    from const import (
+        CONF_DEADBAND,
+        CONF_DEADBAND_PERCENT,
+        CONF_DEBOUNCE,
+        CONF_MAX_INTERVAL,
+        CONF_MIN_INTERVAL,
+    )
+
+FILTER_KEYS = (
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_INTERVAL,
+    CONF_DEBOUNCE,
+)
+
+
+class ValueFilter(object):
+    """Decides when a received value is written to Home Assistant.
+
+    - deadband / deadband_percent: changes smaller than the absolute or relative
+      band around the last written value are held back
+    - max_interval: a held back value is written anyway once the last write is
+      older than this (heartbeat)
+    - min_interval: writes are at least this many seconds apart, the latest
+      value is written when the interval has passed
+    - debounce: a value has to be stable for this many seconds before it is
+      written, for flapping contacts
+    """
+
+    def __init__(
+        self,
+        deadband: float = 0.0,
+        deadband_percent: float = 0.0,
+        min_interval: float = 0.0,
+        max_interval: Optional[float] = None,
+        debounce: float = 0.0,
+    ) -> None:
+        self._deadband = deadband
+        self._deadband_ratio = deadband_percent / 100.0
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._debounce = debounce
+
+        self._written: Any = None
+        self._written_at: Optional[float] = None
+        self._candidate: Any = None
+        self._candidate_since = 0.0
+
+        # Value waiting for a delayed write and the timer doing it.
+        self.pending: Optional[tuple[Any, Callable[[Any], None]]] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    @classmethod
+    def from_config(cls, data: dict) -> Optional["ValueFilter"]:
+        """Create the filter from the entity configuration, None if the entity has
+        no filter options."""
+        options = {k: data[k] for k in FILTER_KEYS if data.get(k) is not None}
+        return cls(**options) if options else None
+
+    def copy(self) -> "ValueFilter":
+        return ValueFilter(
+            self._deadband,
+            self._deadband_ratio * 100.0,
+            self._min_interval,
+            self._max_interval,
+            self._debounce,
+        )
+
+    def _within_deadband(self, value: Any) -> bool:
+        last = self._written
+        if not isinstance(value, (int, float)) or not isinstance(last, (int, float)):
+            return value == last
+        band = max(self._deadband, abs(last) * self._deadband_ratio)
+        return abs(value - last) <= band
+
+    def check(self, value: Any, now: float) -> Optional[float]:
+        """Returns 0 if the value should be written now, the number of seconds after
+        which it should be checked again, or None if it should be dropped."""
+        if value != self._candidate:
+            self._candidate = value
+            self._candidate_since = now
+
+        # The first value is always written right away.
+        if self._written_at is None:
+            return 0
+
+        if self._debounce:
+            if value == self._written:
+                return None
+            stable = now - self._candidate_since
+            if stable < self._debounce:
+                return self._debounce - stable
+
+        elapsed = now - self._written_at
+        heartbeat = self._max_interval is not None and elapsed >= self._max_interval
+        if not heartbeat and self._within_deadband(value):
+            return None
+        if elapsed < self._min_interval:
+            return self._min_interval - elapsed
+        return 0
+
+    def written(self, value: Any, now: float) -> None:
+        self._written = value
+        self._written_at = now
@@ -1,15 +1,96 @@
 import asyncio
+import collections
 import logging
-import json
+import random
+import time
+from typing import Any, Callable, Optional
 import websockets
-from websockets.exceptions import ConnectionClosed
+from websockets.exceptions import ConnectionClosed, WebSocketException
 
+from custom_components.girahs import codec
+from custom_components.girahs.cache import ValueCache
+from custom_components.girahs.capture import TelegramCapture, replay_capture
+from custom_components.girahs.dispatcher import InboundDispatcher
 from custom_components.girahs.entity import GiraEntity
+from custom_components.girahs.helper import from_ga, to_ga
+from custom_components.girahs.iothread import IOThread
+from custom_components.girahs.metrics import Metrics
+from custom_components.girahs.scheduler import CommandScheduler
+from custom_components.girahs.store import ValueStore
+from custom_components.girahs.tracker import CommandTracker
 
 try:
-    from .const import DOMAIN
+    from .const import (
+        CAPTURE_FLUSH_INTERVAL,
+        CMD_READ,
+        CMD_WRITE,
+        CONF_COMMAND_TIMEOUT,
+        CONF_DISPATCH_BATCH_SIZE,
+        CONF_DISPATCH_OVERFLOW,
+        CONF_DISPATCH_QUEUE_SIZE,
+        CONF_HEARTBEAT_INTERVAL,
+        CONF_HEARTBEAT_TIMEOUT,
+        CONF_IO_THREAD,
+        CONF_SEND_QUEUE_SIZE,
+        CONF_SWEEP_MIN_AGE,
+        CONF_SWEEP_TELEGRAMS_PER_MINUTE,
+        CONF_SYNC_CONCURRENCY,
+        CONF_SYNC_ON_CONNECT,
+        CONF_SYNC_TIMEOUT,
+        CONF_TELEGRAMS_PER_SECOND,
+        CONF_UNIQUE_ID_PREFIX,
+        CONF_VALUE_CACHE,
+        CONF_VALUE_CACHE_MAX_AGE,
+        DOMAIN,
+        EARLY_BUFFER_SIZE,
+        EARLY_BUFFER_TIMEOUT,
+        GA_COUNT,
+        PRIORITY_BACKGROUND,
+        PRIORITY_INTERACTIVE,
+        RECONNECT_MAX_DELAY,
+        RECONNECT_MIN_DELAY,
+        STATE_CONNECTED,
+        STATE_CONNECTING,
+        STATE_DISCONNECTED,
+        SWEEP_BUSY_FRACTION,
+        SWEEP_MAX_BACKOFF,
+    )
 except ImportError:
-    from const import DOMAIN
+    from const import (
+        CAPTURE_FLUSH_INTERVAL,
+        CMD_READ,
+        CMD_WRITE,
+        CONF_COMMAND_TIMEOUT,
+        CONF_DISPATCH_BATCH_SIZE,
+        CONF_DISPATCH_OVERFLOW,
+        CONF_DISPATCH_QUEUE_SIZE,
+        CONF_HEARTBEAT_INTERVAL,
+        CONF_HEARTBEAT_TIMEOUT,
+        CONF_IO_THREAD,
+        CONF_SEND_QUEUE_SIZE,
+        CONF_SWEEP_MIN_AGE,
+        CONF_SWEEP_TELEGRAMS_PER_MINUTE,
+        CONF_SYNC_CONCURRENCY,
+        CONF_SYNC_ON_CONNECT,
+        CONF_SYNC_TIMEOUT,
+        CONF_TELEGRAMS_PER_SECOND,
+        CONF_UNIQUE_ID_PREFIX,
+        CONF_VALUE_CACHE,
+        CONF_VALUE_CACHE_MAX_AGE,
+        DOMAIN,
+        EARLY_BUFFER_SIZE,
+        EARLY_BUFFER_TIMEOUT,
+        GA_COUNT,
+        PRIORITY_BACKGROUND,
+        PRIORITY_INTERACTIVE,
+        RECONNECT_MAX_DELAY,
+        RECONNECT_MIN_DELAY,
+        STATE_CONNECTED,
+        STATE_CONNECTING,
+        STATE_DISCONNECTED,
+        SWEEP_BUSY_FRACTION,
+        SWEEP_MAX_BACKOFF,
+    )
 
 # from const import DOMAIN
 
@@ -19,66 +100,763 @@ from homeassistant.const import CONF_HOST, CONF_USERNAME, CONF_PASSWORD
 
 logger = logging.getLogger(__name__)
 
+Handler = Callable[[dict], bool]
+TelegramListener = Callable[[dict], None]
+
+# Result of a read that was not answered in time.
+_MISSING = object()
+
 
 class HomeServerV2(object):
-    def __init__(self, config: config_entries.ConfigType) -> None:
-        self._host = config[DOMAIN][CONF_HOST]
-        self.switches = config[DOMAIN]["switch"]
-        self.covers = config[DOMAIN]["cover"]
-        self.lights = config[DOMAIN]["light"]
-        self.sensors = config[DOMAIN]["sensor"]
-        self.climates = config[DOMAIN]["climate"]
-        self.weathers = config[DOMAIN]["weather"]
-        self.binary_sensors = config[DOMAIN]["binary_sensor"]
-        self._entities: dict[str, GiraEntity] = {}
-
-    def add_entity(self, address: str, entity: GiraEntity) -> None:
+    def __init__(self, config: dict, cache_path: Optional[str] = None) -> None:
+        """Connection to one HomeServer, config is the configuration of the server
+        as validated by SERVER_SCHEMA."""
+        self._host = config[CONF_HOST]
+        self.unique_id_prefix = config[CONF_UNIQUE_ID_PREFIX]
+        self.switches = config.get("switch", [])
+        self.covers = config.get("cover", [])
+        self.lights = config.get("light", [])
+        self.sensors = config.get("sensor", [])
+        self.climates = config.get("climate", [])
+        self.weathers = config.get("weather", [])
+        self.binary_sensors = config.get("binary_sensor", [])
+        # Subscribers and the configured address string per integer group address.
+        # Subscribers are (entity, handler) pairs, the handler applies a received
+        # value to the entity and returns True if its state needs to be written.
+        self._subscribers: list[Optional[tuple[tuple[GiraEntity, Handler], ...]]] = [
+            None
+        ] * GA_COUNT
+        self._addresses: list[Optional[str]] = [None] * GA_COUNT
+        # All subscribed group addresses in registration order.
+        self._registered: list[int] = []
+        # Listeners to raw telegrams per integer group address, indexed from the
+        # subscribed ranges so a telegram costs a single lookup.
+        self._telegram_listeners: list[Optional[tuple[TelegramListener, ...]]] = [
+            None
+        ] * GA_COUNT
+        self._telegram_subscriptions: list[tuple[range, TelegramListener]] = []
+        self._dispatcher = InboundDispatcher(
+            self._dispatch_batch,
+            config[CONF_DISPATCH_QUEUE_SIZE],
+            config[CONF_DISPATCH_BATCH_SIZE],
+            config[CONF_DISPATCH_OVERFLOW],
+        )
+        self._scheduler = CommandScheduler(
+            self._send_frame,
+            config[CONF_TELEGRAMS_PER_SECOND],
+            config[CONF_SEND_QUEUE_SIZE],
+        )
+        self._websocket = None
+        self._tasks: list[asyncio.Task] = []
+        # Set by disconnect, the connection is closed on purpose.
+        self._stopping = False
+        # With an I/O thread the connection runs on the loop of the thread, the
+        # entities, queues and timers stay on the loop of Home Assistant.
+        self._io: Optional[IOThread] = (
+            IOThread(f"girahs {self._host}", self._handle_io_batch)
+            if config[CONF_IO_THREAD]
+            else None
+        )
+        self.metrics = Metrics()
+        self._tracker = CommandTracker(self.metrics, config[CONF_COMMAND_TIMEOUT])
+
+        self._heartbeat_interval = config[CONF_HEARTBEAT_INTERVAL]
+        self._heartbeat_timeout = config[CONF_HEARTBEAT_TIMEOUT]
+        self._last_received = 0.0
+        self._connection_listeners: list[Callable[[], None]] = []
+        self.connection_state = STATE_DISCONNECTED
+        self.reconnects = 0
+        self.latency: Optional[float] = None
+
+        self._sync_on_connect = config[CONF_SYNC_ON_CONNECT]
+        self._sync_concurrency = config[CONF_SYNC_CONCURRENCY]
+        self._sync_timeout = config[CONF_SYNC_TIMEOUT]
+        self._sync_task: Optional[asyncio.Task] = None
+        self._pending_reads: dict[int, asyncio.Future] = {}
+        self.last_sync_duration: Optional[float] = None
+        self.last_sync_missing: Optional[int] = None
+
+        # Last value received per group address with its change sequence number.
+        self._store = ValueStore()
+        # Monotonic time the value was last received, or the address was last
+        # swept, per group address.
+        self._last_seen: list[float] = [0.0] * GA_COUNT
+        self._sweep_rate = config[CONF_SWEEP_TELEGRAMS_PER_MINUTE]
+        self._sweep_min_age = config[CONF_SWEEP_MIN_AGE]
+        self._busy_rate = config[CONF_TELEGRAMS_PER_SECOND] * SWEEP_BUSY_FRACTION
+        self.sweep_reads = 0
+        self.sweep_missing = 0
+        self.sweep_drift = 0
+
+        self._cache: Optional[ValueCache] = None
+        if cache_path is not None and config[CONF_VALUE_CACHE]:
+            self._cache = ValueCache(cache_path)
+        self._cache_max_age = config[CONF_VALUE_CACHE_MAX_AGE]
+        self._capture: Optional[TelegramCapture] = None
+
+        # Frames received before all entities are attached to Home Assistant, None
+        # once they have been replayed.
+        self._early: Optional[collections.deque] = collections.deque()
+        self._unattached: set[GiraEntity] = set()
+        self._ready = False
+        self._early_timer: Optional[asyncio.TimerHandle] = None
+        self.early_dropped = 0
+
+    def load_cache(self) -> None:
+        """Open the value cache, must be called before the entities are created.
+
+        This is blocking and needs to run in the executor."""
+        if self._cache is not None:
+            self._cache.open()
+
+    def close(self) -> None:
+        """Close the value cache and the capture, blocking, run it in the
+        executor after disconnect."""
+        if self._cache is not None:
+            self._cache.close()
+        if self._capture is not None:
+            self._capture.close()
+
+    def enable_capture(self, capture: TelegramCapture) -> None:
+        """Record all frames received from the HomeServer."""
+        self._capture = capture
+
+    async def _flush_capture(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(CAPTURE_FLUSH_INTERVAL)
+            data = self._capture.take()
+            try:
+                await loop.run_in_executor(None, self._capture.write, data)
+            except OSError as e:
+                logger.error("Failed to write telegram capture: %s", e)
+
+    async def replay(self, path: str, speed: float = 1.0) -> int:
+        """Replay a telegram capture as if the frames were received now."""
+        return await replay_capture(
+            path,
+            self.handle_value_changed,
+            speed,
+            lambda: self._dispatcher.congested,
+        )
+
+    def add_entity(
+        self,
+        address: Optional[str],
+        entity: GiraEntity,
+        handler: Optional[Handler] = None,
+    ) -> None:
+        """Subscribe the entity to all values received for the given address.
+
+        Values are passed to handler, handle_cmd of the entity by default.
+        Multiple entities and handlers can subscribe to the same address."""
+        if address is None:
+            return
         logger.debug("Adding entity %s %s", address, entity)
-        self._entities[address] = entity
-        pass
+        if handler is None:
+            handler = entity.handle_cmd
+        ga = to_ga(address)
+        subscribers = self._subscribers[ga] or ()
+        if (entity, handler) in subscribers:
+            return
+        self._subscribers[ga] = subscribers + ((entity, handler),)
+        if entity.hass is None and self._early is not None:
+            self._unattached.add(entity)
+        if self._addresses[ga] is None:
+            self._addresses[ga] = address
+            self._registered.append(ga)
+
+        # Start with the last known value instead of the defaults of the entity.
+        if self._cache is not None:
+            value = self._cache.get(ga, self._cache_max_age)
+            if value is not None:
+                if self._store.get(ga) is None:
+                    self._store.update(ga, value, self._cache.timestamp(ga))
+                handler(
+                    {"cmd": CMD_WRITE, "ga": ga, "address": address, "value": value}
+                )
+
+    def set_ready(self) -> None:
+        """All platforms have registered their entities."""
+        self._ready = True
+        self._check_attached()
+
+    def entity_attached(self, entity: GiraEntity) -> None:
+        """The entity has been added to Home Assistant."""
+        self._unattached.discard(entity)
+        self._check_attached()
+
+    def _check_attached(self) -> None:
+        if self._early is not None and self._ready and not self._unattached:
+            self._replay_early()
+
+    def _replay_early(self) -> None:
+        """Dispatch the frames received before the entities were attached."""
+        frames, self._early = self._early, None
+        if self._early_timer is not None:
+            self._early_timer.cancel()
+            self._early_timer = None
+        if self._unattached:
+            logger.warning(
+                "%d entities of %s not added after %.0fs, dispatching anyway",
+                len(self._unattached),
+                self._host,
+                EARLY_BUFFER_TIMEOUT,
+            )
+            self._unattached.clear()
+        logger.debug("Replaying %d frames received during startup", len(frames))
+        for cmd in frames:
+            if self._subscribers[cmd["ga"]] is None:
+                self.metrics.telegrams_unknown += 1
+            else:
+                self._dispatcher.put(cmd)
+
+    def send_command(self, cmd: dict, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Queue the command for sending, pending commands for the same address are
+        replaced by newer ones."""
+        self._scheduler.put(cmd, priority)
+
+    async def send_bulk(
+        self, commands: list[dict], priority: int = PRIORITY_INTERACTIVE
+    ) -> dict:
+        """Send the commands as one ordered and paced burst and wait until all of
+        them left the send queue.
+
+        Returns the number of sent, failed and superseded commands and the
+        duration of the burst."""
+        result = await self._scheduler.put_burst(commands, priority)
+        logger.info(
+            "Sent %d of %d commands to %s in %.1fs",
+            result["sent"],
+            len(commands),
+            self._host,
+            result["duration"],
+        )
+        return result
+
+    def expect_confirmation(
+        self,
+        address: str,
+        value: Any,
+        owner: GiraEntity,
+        rollback: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Expect the status address to confirm a command sent by owner with value,
+        None accepts any value. rollback is called when no confirmation arrives in
+        time, the echo of the command is not dispatched to owner."""
+        self._tracker.expect(to_ga(address), value, owner, rollback)
+
+    @property
+    def send_queue_depth(self) -> int:
+        return len(self._scheduler)
 
-    async def send_command(self, cmd: dict) -> None:
-        data = json.dumps(cmd)
+    @property
+    def send_stats(self) -> dict:
+        return {
+            "queue_depth": len(self._scheduler),
+            "sent": self._scheduler.sent,
+            "coalesced": self._scheduler.coalesced,
+            "dropped": self._scheduler.dropped,
+        }
+
+    async def _send_frame(self, cmd: dict) -> None:
+        websocket = self._websocket
+        if websocket is None:
+            raise ConnectionError("Not connected to the HomeServer")
+        data = codec.encode_command(cmd)
         logger.debug("Sending event: %s", data)
-        await self._websocket.send(data)
+        try:
+            if self._io is not None:
+                await self._io.run(websocket.send(data))
+            else:
+                await websocket.send(data)
+        except ConnectionClosed as e:
+            raise ConnectionError("Connection to the HomeServer closed") from e
 
-    async def handle_value_changed(self, cmd: dict) -> None:
+    def handle_value_changed(self, cmd: dict, received: Optional[float] = None) -> None:
         """
         Dict in the form of {cmd: type, ga: address, value: val}
+
+        Frames for subscribed addresses are queued for the dispatcher, all other
+        frames are discarded right away. received is the monotonic time the frame
+        arrived and is used to measure the dispatch latency. Until the entities
+        are attached to Home Assistant, frames are buffered instead.
         """
+        if not isinstance(cmd, dict):
+            self.metrics.frames_malformed += 1
+            logger.warning("Discarding malformed frame: %s", cmd)
+            return
         if not "ga" in cmd:
             return
 
-        ga = int(cmd["ga"])
-        x = int(ga / 2048)
-        y = int((ga - x * 2048) / 256)
-        z = int((ga - x * 2048 - y * 256))
-        address = f"{x}/{y}/{z}"
-        cmd["address"] = address
-
         logger.debug("Received message: %s", cmd)
+        try:
+            ga = int(cmd["ga"])
+        except (TypeError, ValueError):
+            self.metrics.frames_malformed += 1
+            logger.warning("Discarding frame with invalid address: %s", cmd)
+            return
+        self.metrics.telegrams_received += 1
+        if not 0 <= ga < GA_COUNT:
+            self.metrics.telegrams_unknown += 1
+            return
+        cmd["ga"] = ga
+        listeners = self._telegram_listeners[ga]
+        if listeners is not None:
+            self.metrics.telegrams_forwarded += 1
+            for listener in listeners:
+                listener(cmd)
+        # The store keeps the values of all addresses, subscribed or not.
+        if cmd.get("cmd") == CMD_WRITE:
+            self._store.update(ga, cmd.get("value"), time.time())
+        if self._subscribers[ga] is None and self._early is None:
+            if listeners is None:
+                self.metrics.telegrams_unknown += 1
+            return
+        # Read requests carry no value, only their responses are of interest.
+        if cmd.get("cmd") == CMD_READ:
+            return
+        if received is not None:
+            cmd["received"] = received
+        self._last_seen[ga] = received or time.monotonic()
+        if self._pending_reads:
+            self._complete_read(ga, cmd)
+        if self._tracker:
+            owner = self._tracker.confirm(ga, cmd.get("value"), received)
+            if owner is not None:
+                cmd["echo"] = owner
+        if self._early is not None:
+            if len(self._early) >= EARLY_BUFFER_SIZE:
+                self._early.popleft()
+                self.early_dropped += 1
+            self._early.append(cmd)
+            return
+        self._dispatcher.put(cmd)
 
-        if address in self._entities:
-            # Add the translated address to the object and defer execution into a new task
-            # to avoid blocking the IO.
-            asyncio.create_task(self._entities[address].handle_cmd(cmd))
+    def _handle_io_batch(self, batch: list[dict], frames: int) -> None:
+        """Frames handed over by the I/O thread, coalesced from frames frames."""
+        self.metrics.telegrams_received += frames - len(batch)
+        for cmd in batch:
+            self.handle_value_changed(cmd, cmd.get("received"))
 
-    async def process_gira_events(self) -> None:
-        """Connect to the homeserver and prcess inbound messages.
+    def _complete_read(self, ga: int, cmd: dict) -> None:
+        future = self._pending_reads.pop(ga, None)
+        if future is not None and not future.done():
+            future.set_result(cmd.get("value"))
+
+    async def _read(self, ga: int) -> Any:
+        """Request the current value of the address and wait for the response,
+        returns _MISSING if there is none in time."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_reads[ga] = future
+        self.send_command({"cmd": CMD_READ, "ga": ga, "value": 0}, PRIORITY_BACKGROUND)
+        try:
+            return await asyncio.wait_for(future, self._sync_timeout)
+        except asyncio.TimeoutError:
+            return _MISSING
+        finally:
+            if self._pending_reads.get(ga) is future:
+                del self._pending_reads[ga]
+
+    async def sync_state(self) -> None:
+        """Read the values of all subscribed addresses.
+
+        A fixed number of reads is in flight at any time, so that large
+        installations do not saturate the bus."""
+        start = time.monotonic()
+        addresses = iter(list(self._registered))
+        missing = 0
+
+        async def worker() -> None:
+            nonlocal missing
+            for ga in addresses:
+                if await self._read(ga) is _MISSING:
+                    missing += 1
+
+        # Every read removes its own future when done or cancelled, reads of the
+        # sweeper that are in flight at the same time are left alone.
+        await asyncio.gather(*[worker() for _ in range(self._sync_concurrency)])
+
+        self.last_sync_duration = time.monotonic() - start
+        self.last_sync_missing = missing
+        logger.info(
+            "Synchronized %d addresses in %.1fs, %d did not respond",
+            len(self._registered),
+            self.last_sync_duration,
+            missing,
+        )
+
+    def _busy(self, received: int, elapsed: float) -> bool:
+        """Whether live traffic or pending commands should take the bus."""
+        if len(self._scheduler) or self._pending_reads:
+            return True
+        if self._sync_task is not None and not self._sync_task.done():
+            return True
+        return elapsed > 0 and received / elapsed > self._busy_rate
 
-        The loop will automatically reconnect if something breaks."""
+    def _stalest(self) -> Optional[int]:
+        """The subscribed address with the oldest value, if it is old enough."""
+        if not self._registered:
+            return None
+        ga = min(self._registered, key=self._last_seen.__getitem__)
+        if time.monotonic() - self._last_seen[ga] < self._sweep_min_age:
+            return None
+        return ga
+
+    async def _sweep(self) -> None:
+        """Re-read the subscribed addresses in the background, oldest values
+        first, to repair telegrams missed during reconnects or bus glitches.
+
+        At most sweep_telegrams_per_minute reads are sent. The sweeper backs off
+        exponentially while live traffic is high or commands are queued."""
+        interval = 60.0 / self._sweep_rate
+        backoff = 1
+        received = self.metrics.telegrams_received
+        last = time.monotonic()
         while True:
-            self._websocket = await websockets.connect(
-                f"ws://{self._host}/cogw?AUTHORIZATION="
+            await asyncio.sleep(interval * backoff)
+            now = time.monotonic()
+            busy = self._busy(self.metrics.telegrams_received - received, now - last)
+            received = self.metrics.telegrams_received
+            last = now
+            if busy or self.connection_state != STATE_CONNECTED:
+                backoff = min(backoff * 2, SWEEP_MAX_BACKOFF)
+                continue
+            backoff = 1
+
+            ga = self._stalest()
+            if ga is None:
+                continue
+            known = self._store.value(ga)
+            # Do not pick the address again right away when there is no answer.
+            self._last_seen[ga] = now
+            self.sweep_reads += 1
+            value = await self._read(ga)
+            if value is _MISSING:
+                self.sweep_missing += 1
+            elif known is not None and value != known:
+                self.sweep_drift += 1
+                logger.info(
+                    "Sweep of %s found %r instead of %r", from_ga(ga), value, known
+                )
+
+    def get_value(self, address: str) -> Optional[tuple[Any, float, int]]:
+        """Last value of the group address, the Unix time it was received and the
+        sequence number of its last change, None if it was never received."""
+        return self._store.get(to_ga(address))
+
+    @property
+    def value_sequence(self) -> int:
+        """Sequence number of the last change of any value."""
+        return self._store.seq
+
+    def changes_since(self, seq: int) -> list[dict]:
+        """The values that changed after the sequence number seq, in the order
+        of the changes. Pass the sequence number of the last change seen to
+        receive only the changes since, 0 returns all known values."""
+        return [
+            {"address": from_ga(ga), "value": value, "time": timestamp, "seq": seq}
+            for ga, value, timestamp, seq in self._store.changes_since(seq)
+        ]
+
+    def _start_sync(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+        self._sync_task = asyncio.create_task(self.sync_state())
+
+    def _dispatch_batch(self, batch: list[dict]) -> None:
+        """Apply a batch of frames to the subscribed entities and write the state
+        of every changed entity once."""
+        dirty: dict[GiraEntity, None] = {}
+        cache = self._cache
+        now = time.time()
+        for cmd in batch:
+            ga = cmd["ga"]
+            if cache is not None and cmd.get("cmd") == CMD_WRITE:
+                cache.set(ga, cmd.get("value"), now)
+            # Add the translated address to the object for the entities.
+            cmd["address"] = self._addresses[ga]
+            echo = cmd.get("echo")
+            for entity, handler in self._subscribers[ga]:
+                # The state of the entity already reflects its own command.
+                if entity is echo:
+                    self.metrics.echoes_suppressed += 1
+                    continue
+                try:
+                    changed = handler(cmd)
+                except Exception:
+                    # A bad value for one entity must not cost the rest of the batch.
+                    logger.exception(
+                        "Failed to apply %s to %s",
+                        cmd,
+                        getattr(entity, "entity_id", entity),
+                    )
+                    continue
+                if changed:
+                    dirty[entity] = None
+
+        metrics = self.metrics
+        for entity in dirty:
+            if entity.hass is None:
+                continue
+            start = time.monotonic()
+            entity.async_write_ha_state()
+            metrics.record_write(entity.entity_id, time.monotonic() - start)
+
+        done = time.monotonic()
+        for cmd in batch:
+            received = cmd.get("received")
+            if received is not None:
+                metrics.dispatch_latency.record(done - received)
+
+    def diagnostics(self) -> dict:
+        """Snapshot of the connection, queues and metrics for troubleshooting."""
+        return {
+            "host": self._host,
+            "codec": codec.NAME,
+            "connection": {
+                "state": self.connection_state,
+                "latency": self.latency,
+                "reconnects": self.reconnects,
+            },
+            "sync": {
+                "duration": self.last_sync_duration,
+                "missing": self.last_sync_missing,
+            },
+            "sweep": {
+                "reads": self.sweep_reads,
+                "missing": self.sweep_missing,
+                "drift": self.sweep_drift,
+            },
+            "subscribed_addresses": len(self._registered),
+            "values": {"known": len(self._store), "sequence": self._store.seq},
+            "inbound": {
+                "queue_depth": len(self._dispatcher),
+                "coalesced": self._dispatcher.coalesced,
+                "dropped": self._dispatcher.dropped,
+                "early_buffered": len(self._early) if self._early is not None else 0,
+                "early_dropped": self.early_dropped,
+            },
+            "outbound": {**self.send_stats, "unconfirmed": len(self._tracker)},
+            "io_thread": (
+                {"coalesced": self._io.coalesced, "handoffs": self._io.handoffs}
+                if self._io is not None
+                else None
+            ),
+            "metrics": self.metrics.as_dict(),
+        }
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    def add_connection_listener(
+        self, listener: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Register a callback for connection state changes, returns a function
+        removing it again."""
+        self._connection_listeners.append(listener)
+        return lambda: self._connection_listeners.remove(listener)
+
+    def _call(self, callback: Callable, *args: Any) -> None:
+        """Call callback on the loop of Home Assistant from the connection."""
+        if self._io is None:
+            callback(*args)
+        else:
+            self._io.call(callback, *args)
+
+    def subscribe_telegrams(
+        self, addresses: range, listener: TelegramListener
+    ) -> Callable[[], None]:
+        """Call listener with every telegram received for the group addresses in
+        the range, whether an entity subscribed to them or not, returns a
+        function removing it again.
+
+        The listener is called before the frame is queued for the entities and
+        must not modify it."""
+        subscription = (addresses, listener)
+        self._telegram_subscriptions.append(subscription)
+        self._index_telegram_listeners(addresses)
+
+        def unsubscribe() -> None:
+            self._telegram_subscriptions.remove(subscription)
+            self._index_telegram_listeners(addresses)
+
+        return unsubscribe
+
+    def _index_telegram_listeners(self, addresses: range) -> None:
+        for ga in addresses:
+            # A listener subscribed with overlapping ranges is called once.
+            listeners = tuple(
+                dict.fromkeys(
+                    listener
+                    for subscribed, listener in self._telegram_subscriptions
+                    if ga in subscribed
+                )
             )
+            self._telegram_listeners[ga] = listeners or None
+
+    def _set_connection_state(self, state: str) -> None:
+        if state == self.connection_state:
+            return
+        self.connection_state = state
+        self._notify_listeners()
+
+    def _notify_listeners(self) -> None:
+        for listener in self._connection_listeners:
+            listener()
+
+    def _stop_sync(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+
+    async def _heartbeat(self, websocket) -> None:
+        """Ping the HomeServer when the connection has been silent for a heartbeat
+        interval and close the connection when no pong arrives in time."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self._heartbeat_interval)
+            if loop.time() - self._last_received < self._heartbeat_interval:
+                continue
+            start = loop.time()
             try:
-                task = None
-                while True:
-                    d = await self._websocket.recv()
-                    task = asyncio.create_task(self.handle_value_changed(json.loads(d)))
+                pong = await websocket.ping()
+                await asyncio.wait_for(pong, self._heartbeat_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "No heartbeat from %s for %.0fs, reconnecting",
+                    self._host,
+                    loop.time() - self._last_received,
+                )
+                await websocket.close()
+                return
             except ConnectionClosed:
-                logger.error("Connection closed, reconnecting")
+                return
+            self.latency = loop.time() - start
+            self._last_received = loop.time()
+            self._call(self._notify_listeners)
+
+    async def _receive(self, websocket) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            d = await websocket.recv()
+            self._last_received = loop.time()
+            received = time.monotonic()
+            try:
+                cmd = codec.loads(d)
+            except ValueError:
+                self.metrics.frames_malformed += 1
+                logger.warning("Discarding malformed frame: %s", d)
+                continue
+            if self._capture is not None:
+                self._capture.record(cmd)
+            if self._io is None:
+                self.handle_value_changed(cmd, received)
+                continue
+            if not isinstance(cmd, dict):
+                self.metrics.frames_malformed += 1
+                logger.warning("Discarding malformed frame: %s", d)
+                continue
+            try:
+                cmd["ga"] = int(cmd["ga"])
+            except KeyError:
                 continue
+            except (TypeError, ValueError):
+                self.metrics.frames_malformed += 1
+                logger.warning("Discarding frame with invalid address: %s", cmd)
+                continue
+            cmd["received"] = received
+            # Listeners to raw telegrams see every telegram, e.g. every press
+            # of a pushbutton, only writes nobody listens to are merged.
+            ga = cmd["ga"]
+            self._io.put(
+                cmd, not 0 <= ga < GA_COUNT or self._telegram_listeners[ga] is None
+            )
+
+    async def process_gira_events(self) -> None:
+        """Connect to the homeserver and prcess inbound messages.
+
+        The loop will automatically reconnect if something breaks, waiting with
+        exponential backoff and jitter between the attempts."""
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            self._call(self._set_connection_state, STATE_CONNECTING)
+            try:
+                websocket = await websockets.connect(
+                    f"ws://{self._host}/cogw?AUTHORIZATION=", ping_interval=None
+                )
+            except (OSError, asyncio.TimeoutError, WebSocketException) as e:
+                logger.warning("Failed to connect to %s: %s", self._host, e)
+            else:
+                logger.info("Connected to %s", self._host)
+                delay = RECONNECT_MIN_DELAY
+                self._websocket = websocket
+                self._last_received = asyncio.get_running_loop().time()
+                self._call(self._set_connection_state, STATE_CONNECTED)
+                heartbeat = asyncio.create_task(self._heartbeat(websocket))
+                if self._sync_on_connect:
+                    self._call(self._start_sync)
+                try:
+                    await self._receive(websocket)
+                except ConnectionClosed:
+                    # Closed by disconnect, which cancels this task right after.
+                    if not self._stopping:
+                        logger.warning(
+                            "Connection to %s closed, reconnecting", self._host
+                        )
+                except Exception:
+                    # Never let a bug in the processing end the connection for good.
+                    logger.exception(
+                        "Unexpected error on the connection to %s, reconnecting",
+                        self._host,
+                    )
+                    await websocket.close()
+                finally:
+                    heartbeat.cancel()
+                    self._call(self._stop_sync)
+                    self._websocket = None
+                self.reconnects += 1
+
+            self._call(self._set_connection_state, STATE_DISCONNECTED)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
 
     async def connect(self) -> None:
-        asyncio.create_task(self.process_gira_events())
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._dispatcher.run()),
+            asyncio.create_task(self._scheduler.run()),
+        ]
+        if self._io is not None:
+            self._io.start(self.process_gira_events())
+        else:
+            self._tasks.append(asyncio.create_task(self.process_gira_events()))
+        if self._capture is not None:
+            self._tasks.append(asyncio.create_task(self._flush_capture()))
+        if self._sweep_rate > 0:
+            self._tasks.append(asyncio.create_task(self._sweep()))
+        # Do not hold back the frames forever for entities that are never added,
+        # e.g. disabled ones.
+        if self._early is not None and self._early_timer is None:
+            self._early_timer = asyncio.get_running_loop().call_later(
+                EARLY_BUFFER_TIMEOUT, self._replay_early
+            )
+
+    async def disconnect(self) -> None:
+        """Stop all background tasks and close the connection."""
+        self._stopping = True
+        if self._websocket is not None:
+            if self._io is not None:
+                await self._io.run(self._websocket.close())
+            else:
+                await self._websocket.close()
+        if self._io is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._io.stop)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._tracker.cancel()
+        if self._early_timer is not None:
+            self._early_timer.cancel()
+            self._early_timer = None
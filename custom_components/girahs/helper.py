@@ -1,12 +1,20 @@
+import logging
+import time
 import typing
 
+try:
+    from . import codec, dpt
+    from .const import CMD_WRITE, DOMAIN
+except ImportError:
+    import codec
+    import dpt
+    from const import CMD_WRITE, DOMAIN
 
-def to_gira_pct(v) -> int:
-    return int((v / 256.0) * 100)
+logger = logging.getLogger(__name__)
 
 
-def to_hass_byte(v) -> int:
-    return int((v / 100.0) * 256)
+to_gira_pct = dpt.byte_to_percent
+to_hass_byte = dpt.percent_to_byte
 
 
 def to_ga(str_address: str) -> int:
@@ -14,5 +22,30 @@ def to_ga(str_address: str) -> int:
     return int(parts[0]) * 2048 + int(parts[1]) * 256 + int(parts[2])
 
 
-def create_cmd(address: int, value: typing.Any, type=1) -> dict:
-    return dict([("cmd", type), ("ga", address), ("value", value)])
+def from_ga(ga: int) -> str:
+    return f"{ga >> 11}/{(ga >> 8) & 0x07}/{ga & 0xFF}"
+
+
+def command_ga(str_address: str, type=CMD_WRITE) -> int:
+    """Convert an address commands are sent to and precompile its frame."""
+    ga = to_ga(str_address)
+    codec.compile_frame(ga, type)
+    return ga
+
+
+def create_cmd(address: int, value: typing.Any, type=CMD_WRITE) -> dict:
+    return {"cmd": type, "ga": address, "value": value}
+
+
+def platform_setup_done(hass, platform: str, entities: int, start: float) -> None:
+    """Log and keep the time the platform took to set up its entities and signal
+    readiness once all platforms have registered their addresses."""
+    data = hass.data[DOMAIN]
+    elapsed = time.monotonic() - start
+    data["setup_times"][platform] = elapsed
+    logger.info("Set up %d %s entities in %.1fms", entities, platform, elapsed * 1000)
+
+    pending = data["pending_platforms"]
+    pending.discard(platform)
+    if not pending:
+        data["ready"].set()
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Coroutine, Optional
+
+try:
+    from .const import CMD_WRITE
+except ImportError:
+    from const import CMD_WRITE
+
+logger = logging.getLogger(__name__)
+
+
+class IOThread(object):
+    """Event loop in a separate thread running the connection to a HomeServer.
+
+    Frames received in the thread are coalesced per group address and handed to
+    the Home Assistant event loop in batches, at most one handoff is scheduled
+    at any time. handler is called on the Home Assistant loop with the batch and
+    the number of frames it was coalesced from."""
+
+    def __init__(self, name: str, handler: Callable[[list[dict], int], None]) -> None:
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._name = name
+        self._handler = handler
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._target: Optional[asyncio.AbstractEventLoop] = None
+
+        self._lock = threading.Lock()
+        self._pending: list[dict] = []
+        # Position of the pending write per group address in the batch.
+        self._latest: dict[int, int] = {}
+        self._frames = 0
+        self._scheduled = False
+
+        self.coalesced = 0
+        self.handoffs = 0
+
+    def start(self, coro: Coroutine) -> None:
+        """Run coro in the thread, must be called from the Home Assistant loop."""
+        self._target = asyncio.get_running_loop()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, args=(coro,), name=self._name, daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, coro: Coroutine) -> None:
+        asyncio.set_event_loop(self.loop)
+        self._task = self.loop.create_task(coro)
+        try:
+            self.loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("I/O thread %s failed", self._name)
+        finally:
+            # Let the tasks the coroutine left behind, e.g. of the websocket,
+            # finish their cleanup before the loop is closed.
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    def _cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def stop(self) -> None:
+        """Cancel the coroutine and wait for the thread, this is blocking."""
+        if self._thread is None:
+            return
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._cancel)
+        self._thread.join()
+        self._thread = None
+
+    def run(self, coro: Coroutine) -> "asyncio.Future[Any]":
+        """Run coro in the thread, returns a future of the Home Assistant loop."""
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def call(self, callback: Callable, *args: Any) -> None:
+        """Call callback on the Home Assistant loop."""
+        self._target.call_soon_threadsafe(callback, *args)
+
+    def put(self, cmd: dict, merge: bool = True) -> None:
+        """Queue a frame whose "ga" has been converted to an int for the handoff,
+        called in the thread. Frames put with merge False are never replaced by
+        a later write to the same address."""
+        ga = cmd["ga"]
+        with self._lock:
+            self._frames += 1
+            if merge and cmd.get("cmd") == CMD_WRITE:
+                pos = self._latest.get(ga)
+                if pos is not None:
+                    self._pending[pos] = cmd
+                    self.coalesced += 1
+                    return
+                self._latest[ga] = len(self._pending)
+            else:
+                # Relative commands and frames that must not be merged are
+                # applied in order.
+                self._latest.pop(ga, None)
+            self._pending.append(cmd)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._target.call_soon_threadsafe(self._handoff)
+
+    def _handoff(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            frames, self._frames = self._frames, 0
+            self._latest = {}
+            self._scheduled = False
+        self.handoffs += 1
+        self._handler(batch, frames)
@@ -1,12 +1,20 @@
 import asyncio
 from datetime import timedelta
 import logging
+import time
 from os import name
 from re import S
 import typing
-from custom_components.girahs import helper
+from custom_components.girahs import dpt, helper
 from custom_components.girahs.entity import GiraEntity
-from custom_components.girahs.helper import create_cmd, to_ga, to_gira_pct, to_hass_byte
+from custom_components.girahs.helper import (
+    command_ga,
+    create_cmd,
+    platform_setup_done,
+    to_ga,
+    to_gira_pct,
+    to_hass_byte,
+)
 
 from homeassistant import core, helpers
 from homeassistant import config_entries
@@ -23,25 +31,26 @@ from homeassistant.components.light import (
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import CMD_STEP, DOMAIN
 from .gira import HomeServerV2
 
-
 logger = logging.getLogger(__name__)
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: core.HomeAssistant,
     config: config_entries.ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: typing.Optional[DiscoveryInfoType] = None,
 ) -> None:
+    start = time.monotonic()
     logger.debug("Setting up lights")
-    api: HomeServerV2 = hass.data[DOMAIN]["api"]
+    servers: list[HomeServerV2] = hass.data[DOMAIN]["servers"]
 
-    lights = [HomeServerLight(l, api) for l in api.lights]
+    lights = [HomeServerLight(l, api) for api in servers for l in api.lights]
     # Adding lights
-    add_entities(lights)
+    async_add_entities(lights)
+    platform_setup_done(hass, "light", len(lights), start)
 
 
 class HomeServerLight(GiraEntity, LightEntity):
@@ -57,6 +66,12 @@ class HomeServerLight(GiraEntity, LightEntity):
         self._attr_brightness_address = (
             light["brightness_address"][0] if "brightness_address" in light else None
         )
+        self._attr_address_ga = command_ga(self._attr_address)
+        self._attr_brightness_address_ga = (
+            command_ga(self._attr_brightness_address)
+            if self._attr_brightness_address is not None
+            else None
+        )
 
         # Color Mode
         if "brightness_address" in light:
@@ -72,56 +87,46 @@ class HomeServerLight(GiraEntity, LightEntity):
             pass
 
         # Subscribe to updates on the on-off
-        api.add_entity(self._attr_state_address, self)
+        self.bind(self._attr_state_address, "_attr_is_on", dpt.boolean)
         # Subscribe to updates on the brightness
-        api.add_entity(self._attr_brightness_address, self)
-
-    async def handle_cmd(self, cmd: dict) -> None:
-        dirty = False
-        # Handle On Off
-        if cmd["address"] == self._attr_state_address:
-            # Turn off
-            if cmd["value"] == 0 and self._attr_is_on:
-                self._attr_is_on = False
-                dirty = True
-            # Turn On
-            if cmd["value"] == 1 and not self._attr_is_on:
-                self._attr_is_on = True
-                dirty = True
-
-        # Handle Brightness
-        if cmd["address"] == self._attr_brightness_address:
-            value = cmd["value"]
-            if cmd["cmd"] == 1 and value != self._attr_brightness:
-                self._attr_brightness = helper.to_hass_byte(value)
-                dirty = True
-            if cmd["cmd"] == 2:
-                self._attr_brightness += helper.to_hass_byte(value)
-                dirty = True
-
-        if dirty:
-            self.schedule_update_ha_state()
-
-    def should_poll(self) -> bool:
-        return False
+        api.add_entity(self._attr_brightness_address, self, self._handle_brightness)
+
+    def _handle_brightness(self, cmd: dict) -> bool:
+        value = cmd["value"]
+        if cmd["cmd"] == CMD_STEP:
+            # Relative dimming by a signed percentage
+            step = dpt.percent_to_byte(abs(value))
+            brightness = self._attr_brightness + (step if value >= 0 else -step)
+            brightness = max(0, min(255, brightness))
+        else:
+            brightness = dpt.percent_to_byte(value)
+        if brightness == self._attr_brightness:
+            return False
+        self._attr_brightness = brightness
+        return True
 
     async def async_turn_on(self, **kwargs):
         # Only if the lamp supports brightness allow changing the brightness.
         if self._attr_color_mode == COLOR_MODE_BRIGHTNESS and ATTR_BRIGHTNESS in kwargs:
-            self._attr_brightness = kwargs.get(ATTR_BRIGHTNESS, 255)
-            cmd = create_cmd(
-                to_ga(self._attr_brightness_address), to_gira_pct(self._attr_brightness)
+            brightness = kwargs.get(ATTR_BRIGHTNESS, 255)
+            percent = to_gira_pct(brightness)
+            cmd = create_cmd(self._attr_brightness_address_ga, percent)
+            # Only the percentage sent is an echo, any other value the dimmer
+            # reports, e.g. clamped to its minimum, is applied to the light.
+            self.send_optimistic(
+                cmd,
+                self._attr_brightness_address,
+                percent,
+                "_attr_brightness",
+                brightness,
             )
-            asyncio.create_task(self._attr_api.send_command(cmd))
 
         # Changing brightness will turn the lamp on as well
         if not self._attr_is_on and not ATTR_BRIGHTNESS in kwargs:
-            cmd = create_cmd(to_ga(self._attr_address), 1)
-            asyncio.create_task(self._attr_api.send_command(cmd))
-            self._attr_is_on = True
+            cmd = create_cmd(self._attr_address_ga, 1)
+            self.send_optimistic(cmd, self._attr_state_address, 1, "_attr_is_on", True)
 
     async def async_turn_off(self, **kwargs: typing.Any) -> None:
         if self._attr_is_on:
-            cmd = create_cmd(to_ga(self._attr_address), 0)
-            asyncio.create_task(self._attr_api.send_command(cmd))
-            self._attr_is_on = False
+            cmd = create_cmd(self._attr_address_ga, 0)
+            self.send_optimistic(cmd, self._attr_state_address, 0, "_attr_is_on", False)
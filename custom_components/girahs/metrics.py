@@ -0,0 +1,131 @@
+import bisect
+import time
+from typing import Optional
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket
+# collects everything above.
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+# Entity state writes slower than this are tracked per entity.
+SLOW_WRITE_THRESHOLD = 0.005
+
+
+class Histogram(object):
+    """Fixed bucket histogram, recording is a bisect and two additions."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket containing the p-th percentile."""
+        if self.count == 0:
+            return None
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._buckets[i] if i < len(self._buckets) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": dict(zip([*map(str, self._buckets), "inf"], self.counts)),
+        }
+
+
+class Metrics(object):
+    """Counters and latency histograms of the inbound and outbound pipeline."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.telegrams_received = 0
+        self.telegrams_unknown = 0
+        self.telegrams_forwarded = 0
+        self.frames_malformed = 0
+        self.state_writes = 0
+        # Time from receiving a frame on the websocket to the state write.
+        self.dispatch_latency = Histogram()
+        # Duration of a single entity state write.
+        self.write_duration = Histogram()
+        self.slow_writes: dict[str, int] = {}
+        # Time from issuing a command to the status telegram confirming it.
+        self.command_latency = Histogram()
+        self.commands_confirmed = 0
+        self.commands_contradicted = 0
+        self.commands_timed_out = 0
+        self.echoes_suppressed = 0
+        self._rate_count = 0
+        self._rate_time = self.started
+
+    def sample_rate(self) -> float:
+        """Telegrams received per second since the previous call."""
+        now = time.monotonic()
+        elapsed = now - self._rate_time
+        rate = (
+            (self.telegrams_received - self._rate_count) / elapsed if elapsed else 0.0
+        )
+        self._rate_count = self.telegrams_received
+        self._rate_time = now
+        return rate
+
+    def record_write(self, entity_id: str, duration: float) -> None:
+        self.state_writes += 1
+        self.write_duration.record(duration)
+        if duration >= SLOW_WRITE_THRESHOLD:
+            self.slow_writes[entity_id] = self.slow_writes.get(entity_id, 0) + 1
+
+    def as_dict(self) -> dict:
+        return {
+            "uptime": time.monotonic() - self.started,
+            "telegrams_received": self.telegrams_received,
+            "telegrams_unknown": self.telegrams_unknown,
+            "telegrams_forwarded": self.telegrams_forwarded,
+            "frames_malformed": self.frames_malformed,
+            "state_writes": self.state_writes,
+            "dispatch_latency": self.dispatch_latency.as_dict(),
+            "write_duration": self.write_duration.as_dict(),
+            "slow_writes": dict(
+                sorted(self.slow_writes.items(), key=lambda i: i[1], reverse=True)
+            ),
+            "command_latency": self.command_latency.as_dict(),
+            "commands_confirmed": self.commands_confirmed,
+            "commands_contradicted": self.commands_contradicted,
+            "commands_timed_out": self.commands_timed_out,
+            "echoes_suppressed": self.echoes_suppressed,
+        }
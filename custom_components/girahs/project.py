@@ -0,0 +1,326 @@
+"""Entities generated from a project export with the group addresses.
+
+The export is the group address XML as exported by the ETS and imported by
+the HomeServer Experte, or the 0.xml of a .knxproj. It is stream parsed into a
+flat index of the group addresses, which is cached together with the hash of
+the file, so that an unchanged export is not parsed again on every start.
+
+Entities are generated per innermost group range by the datapoint types of its
+addresses, ranges named only by a function like "Schalten" are merged into the
+range above them. Within a range the addresses are paired per device by their
+names, or in their order if the names do not tell the devices apart."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Optional
+
+import voluptuous as vol
+
+from . import schema
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# Names of addresses reporting a state rather than taking a command.
+_STATUS_NAME = re.compile(r"\b(status|state|rückmeldung|rm)\b", re.IGNORECASE)
+# Words naming the function of an address rather than the device.
+_FUNCTION_NAME = re.compile(
+    r"\b(schalten|ein/aus|dimmen|dimmwert|helligkeit|wert|auf/ab|stopp?|position|"
+    r"switch|on/off|dimming|brightness|value|up/down)\b",
+    re.IGNORECASE,
+)
+_DPT = re.compile(r"DPS?T-(\d+)(?:-(\d+))?")
+
+SENSOR_TYPES = {
+    (9, 1): "common_temperature",
+    (9, 4): "luminous_flux",
+    (9, 5): "wind_speed_ms",
+    (9, 6): "pressure_2byte",
+    (9, 7): "humidity",
+}
+SENSOR_MAIN_TYPES = {9: "2byte_float", 14: "4byte_float"}
+
+ENTITY_SCHEMAS = {
+    "light": schema.LIGHT_SCHEMA,
+    "switch": schema.SWITCH_SCHEMA,
+    "cover": schema.COVER_SCHEMA,
+    "sensor": schema.SENSOR_SCHEMA,
+}
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _address(value: str) -> Optional[str]:
+    try:
+        return schema.ga_validator(int(value) if value.isdigit() else value)
+    except vol.Invalid:
+        return None
+
+
+def parse_project(path: str) -> list[dict]:
+    """Index of the group addresses in the export, blocking.
+
+    Elements are cleared once they have been read, so the document is never
+    held in memory as a whole."""
+    index = []
+    ranges: list[str] = []
+    for event, element in ElementTree.iterparse(path, events=("start", "end")):
+        tag = _local(element.tag)
+        if event == "start":
+            if tag == "GroupRange":
+                ranges.append(element.get("Name", ""))
+            continue
+        if tag == "GroupRange":
+            ranges.pop()
+        elif tag == "GroupAddress":
+            address = _address(element.get("Address", ""))
+            dpt = _DPT.search(element.get("DPTs") or element.get("DatapointType") or "")
+            if address is not None:
+                index.append(
+                    {
+                        "address": address,
+                        "name": element.get("Name", address),
+                        "dpt": (
+                            [int(dpt[1]), int(dpt[2]) if dpt[2] else None]
+                            if dpt
+                            else None
+                        ),
+                        "range": list(ranges),
+                    }
+                )
+        else:
+            continue
+        element.clear()
+    return index
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_index(path: str, cache_path: str) -> list[dict]:
+    """Index of the export, from the cache if the file did not change, blocking."""
+    file_hash = _file_hash(path)
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached["version"] == CACHE_VERSION and cached["hash"] == file_hash:
+            logger.debug("Using the cached index of %s", path)
+            return cached["addresses"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    start = time.monotonic()
+    index = parse_project(path)
+    logger.info(
+        "Parsed %d group addresses from %s in %.1fs",
+        len(index),
+        path,
+        time.monotonic() - start,
+    )
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(
+                {"version": CACHE_VERSION, "hash": file_hash, "addresses": index}, f
+            )
+    except OSError as err:
+        logger.warning("Cannot cache the index of %s: %s", path, err)
+    return index
+
+
+def _of(entries: list[dict], main: int, *subs: int) -> list[dict]:
+    return [
+        e
+        for e in entries
+        if e["dpt"] and e["dpt"][0] == main and (not subs or e["dpt"][1] in subs)
+    ]
+
+
+def _split(entries: list[dict]) -> tuple[list[str], list[str]]:
+    """Command and status addresses of the entries."""
+    commands = [e["address"] for e in entries if not _STATUS_NAME.search(e["name"])]
+    states = [e["address"] for e in entries if _STATUS_NAME.search(e["name"])]
+    return commands, states
+
+
+def _device(name: str) -> str:
+    """Name without the words naming the function of an address."""
+    name = _FUNCTION_NAME.sub(" ", _STATUS_NAME.sub(" ", name))
+    return " ".join(re.findall(r"\w+", name))
+
+
+def _name(entries: list[dict], address: str) -> str:
+    name = next(e["name"] for e in entries if e["address"] == address)
+    return _device(name) or name
+
+
+def _nth(addresses: list[str], i: int, count: int) -> Optional[str]:
+    """Address of the i-th of count devices, None unless there is one per device."""
+    return addresses[i] if len(addresses) == count else None
+
+
+def _devices(name: str, entries: list[dict]) -> list[tuple[str, list[dict]]]:
+    """Entries of the group split into the devices they belong to.
+
+    The addresses of a device are paired by their names without the function
+    words, e.g. "Decke Schalten", "Decke Dimmwert" and "Decke Status". If a
+    name does not match the name of a switching or up/down address, the group
+    is taken as one device and its addresses are paired in their order.
+    Sensors are generated per address and not part of a device."""
+    primaries = [e for e in _of(entries, 1, 1, 8) if not _STATUS_NAME.search(e["name"])]
+    if len(primaries) <= 1:
+        return [(name, entries)]
+    devices: dict[str, tuple[str, list[dict]]] = {}
+    for entry in primaries:
+        device = _device(entry["name"])
+        devices.setdefault(device.casefold(), (device or entry["name"], []))
+    for entry in _of(entries, 1) + _of(entries, 5, 1):
+        device = devices.get(_device(entry["name"]).casefold())
+        if device is None:
+            return [(name, entries)]
+        device[1].append(entry)
+    return list(devices.values())
+
+
+def _generate_device(name: str, entries: list[dict], entities: dict, used: set) -> None:
+    switching = _of(entries, 1, 1)
+    percent = _of(entries, 5, 1)
+    updown = [e["address"] for e in _of(entries, 1, 8)]
+    single = len(updown) + len(_split(switching)[0]) == 1
+
+    if updown:
+        steps = [e["address"] for e in _of(entries, 1, 7)]
+        stops = [e["address"] for e in _of(entries, 1, 10, 17)]
+        positions, position_states = _split(percent)
+        count = len(updown)
+        for i, address in enumerate(updown):
+            step = _nth(steps, i, count) or _nth(stops, i, count)
+            stop = _nth(stops, i, count) or step
+            position = _nth(positions, i, count) or _nth(position_states, i, count)
+            position_state = _nth(position_states, i, count) or position
+            if step is None or position is None:
+                logger.debug("Skipping cover %s without stop or position address", name)
+                continue
+            cover = {
+                "name": name if single else _name(entries, address),
+                "move_long_address": [address],
+                "move_short_address": [step],
+                "stop_address": [stop],
+                "position_address": [position],
+                "position_state_address": [position_state],
+            }
+            entities["cover"].append(cover)
+            used.update(_addresses(cover))
+        percent = [e for e in percent if e["address"] not in used]
+
+    commands, states = _split(switching)
+    # Switching addresses are paired with the status and brightness addresses in
+    # their order, the ones left without brightness address become switches.
+    brightness, _ = _split(percent)
+    for i, command in enumerate(commands):
+        entity = {
+            "name": name if single else _name(entries, command),
+            "address": [command],
+            "state_address": [_nth(states, i, len(commands)) or command],
+        }
+        if i < len(brightness):
+            entity["brightness_address"] = [brightness[i]]
+            entities["light"].append(entity)
+        else:
+            entities["switch"].append(entity)
+        used.update(_addresses(entity))
+
+
+def _generate_group(name: str, entries: list[dict], entities: dict) -> None:
+    used: set = set()
+    for device, device_entries in _devices(name, entries):
+        _generate_device(device, device_entries, entities, used)
+
+    for entry in _of(entries, 9) + _of(entries, 14):
+        main, sub = entry["dpt"]
+        entities["sensor"].append(
+            {
+                "name": entry["name"],
+                "state_address": [entry["address"]],
+                "type": SENSOR_TYPES.get((main, sub), SENSOR_MAIN_TYPES[main]),
+                "state_class": "measurement",
+            }
+        )
+        used.add(entry["address"])
+
+    for entry in entries:
+        if entry["address"] not in used:
+            logger.debug(
+                "Skipping %s %s (DPT %s) of %s without a matching entity",
+                entry["address"],
+                entry["name"],
+                entry["dpt"],
+                name,
+            )
+
+
+def generate_entities(index: list[dict]) -> dict[str, list[dict]]:
+    """Entity configurations per platform for the addresses in the index."""
+    groups: dict[tuple, list[dict]] = {}
+    for entry in index:
+        ranges = tuple(entry["range"])
+        # Ranges named by a function only, like "Schalten" and "Status", hold
+        # the same devices, they are grouped by the range above them and the
+        # function is kept in the names of their addresses.
+        if ranges and not _device(ranges[-1]):
+            entry = {**entry, "name": f"{entry['name']} {ranges[-1]}"}
+            ranges = ranges[:-1]
+        groups.setdefault(ranges, []).append(entry)
+
+    entities: dict[str, list[dict]] = {platform: [] for platform in ENTITY_SCHEMAS}
+    for ranges, entries in groups.items():
+        name = ranges[-1] if ranges and ranges[-1] else entries[0]["name"]
+        _generate_group(name, entries, entities)
+    return entities
+
+
+def _addresses(entity: dict) -> set:
+    return {
+        address
+        for value in entity.values()
+        if isinstance(value, list)
+        for address in value
+    }
+
+
+def merge_entities(conf: dict, generated: dict[str, list[dict]]) -> dict:
+    """Server configuration with the generated entities added, entities using an
+    address of a configured entity are skipped."""
+    conf = dict(conf)
+    configured = set()
+    for platform in ENTITY_SCHEMAS:
+        for entity in conf.get(platform, []):
+            configured |= _addresses(entity)
+
+    added = 0
+    for platform, entities in generated.items():
+        validated = []
+        for entity in entities:
+            if _addresses(entity) & configured:
+                continue
+            try:
+                validated.append(ENTITY_SCHEMAS[platform](entity))
+            except vol.Invalid as err:
+                logger.warning("Skipping generated %s %s: %s", platform, entity, err)
+        conf[platform] = conf.get(platform, []) + validated
+        added += len(validated)
+    logger.info("Added %d entities from the project export", added)
+    return conf
@@ -0,0 +1,111 @@
+import collections
+from array import array
+from typing import Optional
+
+STAT_MIN = "min"
+STAT_MAX = "max"
+STAT_MEAN = "mean"
+STAT_LAST = "last"
+STATISTICS = [STAT_MIN, STAT_MAX, STAT_MEAN, STAT_LAST]
+
+
+class _Window(object):
+    """Aggregates of the samples of the last length seconds, updated as samples
+    enter and leave the window instead of being recomputed."""
+
+    def __init__(self, length: float) -> None:
+        self.length = length
+        # Sequence number of the oldest sample in the window.
+        self.start = 0
+        self.count = 0
+        self.sum = 0.0
+        # Sequence numbers of the candidates for the minimum and maximum, their
+        # values are increasing resp. decreasing.
+        self.min: collections.deque[int] = collections.deque()
+        self.max: collections.deque[int] = collections.deque()
+
+
+class RingBuffer(object):
+    """Fixed number of timestamped samples of one group address, kept in arrays
+    with rolling aggregates over one or more windows.
+
+    Samples are numbered by a sequence number, sample seq is stored in slot
+    seq % size. A window never covers more than the size of the buffer, when a
+    sample still inside a window is overwritten, it leaves the window first."""
+
+    def __init__(self, size: int, windows: list[float]) -> None:
+        self.size = size
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        # Sequence number of the next sample.
+        self._head = 0
+        self._windows = [_Window(length) for length in windows]
+
+    def __len__(self) -> int:
+        return min(self._head, self.size)
+
+    def _value(self, seq: int) -> float:
+        return self._values[seq % self.size]
+
+    def _expire(self, window: _Window, now: float, oldest: int) -> None:
+        """Drop the samples older than the window or the sequence number oldest."""
+        cutoff = now - window.length
+        times = self._times
+        while window.start < self._head and (
+            window.start < oldest or times[window.start % self.size] < cutoff
+        ):
+            seq = window.start
+            window.start += 1
+            window.count -= 1
+            window.sum -= self._value(seq)
+            if window.min and window.min[0] == seq:
+                window.min.popleft()
+            if window.max and window.max[0] == seq:
+                window.max.popleft()
+        if not window.count:
+            # Do not carry rounding errors over into the next samples.
+            window.sum = 0.0
+
+    def append(self, value: float, now: float) -> None:
+        seq = self._head
+        for window in self._windows:
+            self._expire(window, now, seq - self.size + 1)
+        slot = seq % self.size
+        self._times[slot] = now
+        self._values[slot] = value
+        self._head += 1
+
+        for window in self._windows:
+            window.count += 1
+            window.sum += value
+            while window.min and self._value(window.min[-1]) >= value:
+                window.min.pop()
+            window.min.append(seq)
+            while window.max and self._value(window.max[-1]) <= value:
+                window.max.pop()
+            window.max.append(seq)
+
+    @property
+    def last(self) -> Optional[float]:
+        return self._value(self._head - 1) if self._head else None
+
+    def statistics(self, now: float) -> list[dict]:
+        """Minimum, maximum, mean and number of the samples per window, the
+        statistics of empty windows are None."""
+        result = []
+        for window in self._windows:
+            self._expire(window, now, self._head - self.size)
+            if not window.count:
+                result.append(
+                    {STAT_MIN: None, STAT_MAX: None, STAT_MEAN: None, "count": 0}
+                )
+                continue
+            result.append(
+                {
+                    STAT_MIN: self._value(window.min[0]),
+                    STAT_MAX: self._value(window.max[0]),
+                    STAT_MEAN: window.sum / window.count,
+                    "count": window.count,
+                }
+            )
+        return result
@@ -0,0 +1,158 @@
+import asyncio
+import collections
+import logging
+import time
+from typing import Awaitable, Callable
+
+try:
+    from .const import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+except ImportError:
+    from const import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+SENT = "sent"
+FAILED = "failed"
+SUPERSEDED = "superseded"
+
+
+class _Burst(object):
+    """Completion of a group of commands queued together."""
+
+    def __init__(self, count: int) -> None:
+        self.remaining = count
+        self.counts = {SENT: 0, FAILED: 0, SUPERSEDED: 0}
+        self.started = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+        if count == 0:
+            self._resolve()
+
+    def finish(self, outcome: str) -> None:
+        self.counts[outcome] += 1
+        self.remaining -= 1
+        if self.remaining == 0:
+            self._resolve()
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(
+                {**self.counts, "duration": time.monotonic() - self.started}
+            )
+
+
+class CommandScheduler(object):
+    """Paced write queue for the commands sent to the HomeServer.
+
+    Pending commands are kept per (group address, command type), a newer command
+    for the same key replaces the pending one (last write wins) and is queued
+    after the commands put before it, so the final writes keep their order.
+    Interactive commands are always sent before background commands and the
+    output is limited to the configured number of telegrams per second."""
+
+    def __init__(
+        self,
+        sender: Callable[[dict], Awaitable[None]],
+        telegrams_per_second: float,
+        max_size: int,
+    ) -> None:
+        self._sender = sender
+        self._interval = 1.0 / telegrams_per_second
+        self._max_size = max_size
+        self._lanes: tuple[collections.OrderedDict, ...] = (
+            collections.OrderedDict(),
+            collections.OrderedDict(),
+        )
+        self._wakeup = asyncio.Event()
+        self._next_send = 0.0
+        # Burst per queued command, by id of the command dict.
+        self._bursts: dict[int, _Burst] = {}
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        # Whether the last send failed for lack of a connection.
+        self._offline = False
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes)
+
+    def put(self, cmd: dict, priority: int = PRIORITY_INTERACTIVE) -> None:
+        key = (cmd["ga"], cmd["cmd"])
+        interactive = self._lanes[PRIORITY_INTERACTIVE]
+        background = self._lanes[PRIORITY_BACKGROUND]
+
+        # The superseded command is removed and the newer one queued at the end,
+        # so it is not sent before the commands for other keys queued after it.
+        if key in interactive:
+            self.coalesced += 1
+            self._finish(interactive.pop(key), SUPERSEDED)
+            priority = PRIORITY_INTERACTIVE
+        elif key in background:
+            self.coalesced += 1
+            self._finish(background.pop(key), SUPERSEDED)
+        elif len(self) >= self._max_size:
+            self.dropped += 1
+            if background:
+                # Make room by discarding the oldest background command.
+                self._finish(background.popitem(last=False)[1], FAILED)
+            else:
+                logger.warning("Send queue full, dropping command %s", cmd)
+                self._finish(cmd, FAILED)
+                return
+
+        self._lanes[priority][key] = cmd
+        self._wakeup.set()
+
+    def put_burst(
+        self, cmds: list[dict], priority: int = PRIORITY_INTERACTIVE
+    ) -> asyncio.Future:
+        """Queue the commands in order, returns a future resolving to the number of
+        sent, failed and superseded commands once all of them left the queue."""
+        burst = _Burst(len(cmds))
+        for cmd in cmds:
+            self._bursts[id(cmd)] = burst
+            self.put(cmd, priority)
+        return burst.future
+
+    def _finish(self, cmd: dict, outcome: str) -> None:
+        if self._bursts:
+            burst = self._bursts.pop(id(cmd), None)
+            if burst is not None:
+                burst.finish(outcome)
+
+    def _pop(self) -> dict:
+        for lane in self._lanes:
+            if lane:
+                return lane.popitem(last=False)[1]
+        raise IndexError("Send queue is empty")
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            while len(self):
+                delay = self._next_send - loop.time()
+                if delay > 0:
+                    # Wait before picking the command so that commands queued in
+                    # the meantime can still be coalesced or take priority.
+                    await asyncio.sleep(delay)
+                    continue
+                cmd = self._pop()
+                self._next_send = loop.time() + self._interval
+                try:
+                    await self._sender(cmd)
+                    self.sent += 1
+                    self._finish(cmd, SENT)
+                    self._offline = False
+                except ConnectionError as e:
+                    self.dropped += 1
+                    self._finish(cmd, FAILED)
+                    # Report an outage once instead of for every queued command.
+                    if not self._offline:
+                        logger.warning("Dropping commands while disconnected: %s", e)
+                    self._offline = True
+                except Exception:
+                    self.dropped += 1
+                    self._finish(cmd, FAILED)
+                    logger.exception("Failed to send command %s", cmd)
+            self._wakeup.clear()
@@ -0,0 +1,171 @@
+"""Configuration schemas of the entities of the HomeServer platforms.
+
+Only the keys the entities actually read are validated, other keys of the
+KNX integration schemas that older configurations may still carry are
+dropped, so that existing configurations keep working.
+"""
+
+import re
+
+import voluptuous as vol
+
+from homeassistant.const import CONF_DEVICE_CLASS, CONF_NAME, CONF_TYPE
+from homeassistant.helpers import config_validation
+
+CONF_ADDRESS = "address"
+CONF_STATE_ADDRESS = "state_address"
+CONF_STATE_CLASS = "state_class"
+CONF_BRIGHTNESS_ADDRESS = "brightness_address"
+CONF_MOVE_LONG_ADDRESS = "move_long_address"
+CONF_MOVE_SHORT_ADDRESS = "move_short_address"
+CONF_POSITION_ADDRESS = "position_address"
+CONF_POSITION_STATE_ADDRESS = "position_state_address"
+CONF_STOP_ADDRESS = "stop_address"
+CONF_TEMPERATURE_ADDRESS = "temperature_address"
+CONF_TARGET_TEMPERATURE_STATE_ADDRESS = "target_temperature_state_address"
+WEATHER_ADDRESSES = [
+    "address_temperature",
+    "address_air_pressure",
+    "address_humidity",
+    "address_wind_speed",
+    "address_wind_bearing",
+    "address_brightness_south",
+    "address_brightness_west",
+    "address_brightness_east",
+    "address_brightness_north",
+]
+
+_GA_PATTERN = re.compile(r"^(\d+)/(\d+)(?:/(\d+))?$")
+
+
+def ga_validator(value) -> str:
+    """Validate a group address, returns it in three level notation.
+
+    Accepts "main/middle/sub", "main/sub" and the raw 16 bit address."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        if not 0 <= value < 1 << 16:
+            raise vol.Invalid(f"group address {value} out of range")
+        return f"{value >> 11}/{(value >> 8) & 0x07}/{value & 0xFF}"
+    match = _GA_PATTERN.match(str(value).strip())
+    if match is None:
+        raise vol.Invalid(f"invalid group address {value!r}")
+    main, middle, sub = match.groups()
+    if sub is None:
+        main, sub = int(main), int(middle)
+        if not (main <= 31 and sub <= 2047):
+            raise vol.Invalid(f"group address {value!r} out of range")
+        return f"{main}/{sub >> 8}/{sub & 0xFF}"
+    if not (int(main) <= 31 and int(middle) <= 7 and int(sub) <= 255):
+        raise vol.Invalid(f"group address {value!r} out of range")
+    return f"{int(main)}/{int(middle)}/{int(sub)}"
+
+
+ga_list_validator = vol.All(
+    config_validation.ensure_list, vol.Length(min=1), [ga_validator]
+)
+
+_GROUP_PATTERN = re.compile(r"^(\d+)(?:/(\d+))?/\*$")
+
+
+def _ga_int(value) -> int:
+    main, middle, sub = (int(part) for part in ga_validator(value).split("/"))
+    return main << 11 | middle << 8 | sub
+
+
+def ga_pattern_validator(value) -> range:
+    """Validate a pattern of group addresses, returns the range of the raw
+    addresses it matches.
+
+    Accepts a single address, a main group as "main/*", a middle group
+    as "main/middle/*" and an inclusive range as "from-to"."""
+    if isinstance(value, int):
+        ga = _ga_int(value)
+        return range(ga, ga + 1)
+    value = str(value).strip()
+    if "-" in value:
+        start, _, end = value.partition("-")
+        start, end = _ga_int(start), _ga_int(end)
+        if end < start:
+            raise vol.Invalid(f"empty group address range {value!r}")
+        return range(start, end + 1)
+    match = _GROUP_PATTERN.match(value)
+    if match is None:
+        ga = _ga_int(value)
+        return range(ga, ga + 1)
+    main, middle = match.groups()
+    main = int(main)
+    if main > 31 or (middle is not None and int(middle) > 7):
+        raise vol.Invalid(f"group address pattern {value!r} out of range")
+    if middle is None:
+        return range(main << 11, (main + 1) << 11)
+    start = main << 11 | int(middle) << 8
+    return range(start, start + 256)
+
+
+def _entity_schema(schema: dict) -> vol.Schema:
+    return vol.Schema(
+        {vol.Required(CONF_NAME): config_validation.string, **schema},
+        extra=vol.REMOVE_EXTRA,
+    )
+
+
+LIGHT_SCHEMA = _entity_schema(
+    {
+        vol.Required(CONF_ADDRESS): ga_list_validator,
+        vol.Required(CONF_STATE_ADDRESS): ga_list_validator,
+        vol.Optional(CONF_BRIGHTNESS_ADDRESS): ga_list_validator,
+    }
+)
+
+SWITCH_SCHEMA = _entity_schema(
+    {
+        vol.Required(CONF_ADDRESS): ga_list_validator,
+        vol.Required(CONF_STATE_ADDRESS): ga_list_validator,
+    }
+)
+
+COVER_SCHEMA = _entity_schema(
+    {
+        vol.Required(CONF_MOVE_LONG_ADDRESS): ga_list_validator,
+        vol.Required(CONF_MOVE_SHORT_ADDRESS): ga_list_validator,
+        vol.Required(CONF_POSITION_ADDRESS): ga_list_validator,
+        vol.Required(CONF_POSITION_STATE_ADDRESS): ga_list_validator,
+        vol.Required(CONF_STOP_ADDRESS): ga_list_validator,
+    }
+)
+
+CLIMATE_SCHEMA = _entity_schema(
+    {
+        vol.Required(CONF_TEMPERATURE_ADDRESS): ga_list_validator,
+        vol.Required(CONF_TARGET_TEMPERATURE_STATE_ADDRESS): ga_list_validator,
+    }
+)
+
+WEATHER_SCHEMA = _entity_schema(
+    {vol.Required(key): ga_list_validator for key in WEATHER_ADDRESSES}
+)
+
+SENSOR_SCHEMA = _entity_schema(
+    {
+        vol.Required(CONF_STATE_ADDRESS): ga_list_validator,
+        vol.Required(CONF_TYPE): config_validation.string,
+        vol.Optional(CONF_STATE_CLASS): config_validation.string,
+    }
+)
+
+BINARY_SENSOR_SCHEMA = _entity_schema(
+    {
+        vol.Required(CONF_STATE_ADDRESS): ga_list_validator,
+        vol.Optional(CONF_DEVICE_CLASS, default=None): vol.Any(
+            None, config_validation.string
+        ),
+    }
+)
+
+
+def platform_node(platform: str, schema: vol.Schema, options: dict = None) -> dict:
+    """Schema node of a platform, a list of entities that accept the entity keys
+    and the additional options."""
+    if options:
+        schema = schema.extend(options)
+    return {vol.Optional(platform): vol.All(config_validation.ensure_list, [schema])}
@@ -1,4 +1,5 @@
 import logging
+import time
 import typing
 from custom_components.girahs.entity import GiraEntity
 
@@ -6,28 +7,42 @@ from homeassistant import core
 from homeassistant import config_entries
 from homeassistant.components import sensor
 from homeassistant.const import DEVICE_CLASS_ILLUMINANCE, DEVICE_CLASS_TEMPERATURE
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import DiscoveryInfoType
 
-from .const import DOMAIN
+from .const import (
+    CONF_AGGREGATE,
+    CONF_AGGREGATE_INTERVAL,
+    CONF_AGGREGATE_SIZE,
+    CONF_AGGREGATE_STATE,
+    CONF_AGGREGATE_WINDOWS,
+    DOMAIN,
+)
 from .gira import HomeServerV2
+from .helper import platform_setup_done
+from .ringbuffer import STAT_LAST, RingBuffer
 
 logger = logging.getLogger(__name__)
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: core.HomeAssistant,
     config: config_entries.ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: typing.Optional[DiscoveryInfoType] = None,
 ) -> None:
+    start = time.monotonic()
     logger.info("Setting up binary sensor")
-    api: HomeServerV2 = hass.data[DOMAIN]["api"]
+    servers: list[HomeServerV2] = hass.data[DOMAIN]["servers"]
 
-    entities = [HomeServerSensor(l, api) for l in api.sensors]
+    entities = [HomeServerSensor(l, api) for api in servers for l in api.sensors]
+    for api in servers:
+        entities.extend(_metric_sensors(api))
 
     # Add the entities to Home Asssitant
-    add_entities(entities)
+    async_add_entities(entities)
+    platform_setup_done(hass, "sensor", len(entities), start)
 
 
 class HomeServerSensor(GiraEntity, sensor.SensorEntity):
@@ -40,7 +55,80 @@ class HomeServerSensor(GiraEntity, sensor.SensorEntity):
         self._attr_device_class = self._to_device_class(data["type"])
         self._attr_state_class = data["state_class"] if "state_class" in data else None
 
-        self._attr_api.add_entity(self._attr_address, self)
+        aggregate = data.get(CONF_AGGREGATE)
+        self._attr_aggregate: typing.Optional[RingBuffer] = None
+        self._attr_aggregate_timer = None
+        if aggregate is None:
+            self.bind(self._attr_address, "_attr_native_value")
+            return
+
+        # Samples are only buffered, the statistics are written at a fixed
+        # cadence and the value filter does not apply.
+        self._attr_aggregate = RingBuffer(
+            aggregate[CONF_AGGREGATE_SIZE], aggregate[CONF_AGGREGATE_WINDOWS]
+        )
+        self._attr_aggregate_windows = aggregate[CONF_AGGREGATE_WINDOWS]
+        self._attr_aggregate_state = aggregate[CONF_AGGREGATE_STATE]
+        self._attr_aggregate_interval = aggregate[CONF_AGGREGATE_INTERVAL]
+        # Whether samples were added since the statistics were last updated.
+        self._attr_aggregate_pending = False
+        self._attr_extra_state_attributes = {}
+        api.add_entity(self._attr_address, self, self._add_sample)
+
+    def _add_sample(self, cmd: dict) -> bool:
+        value = cmd["value"]
+        if not isinstance(value, (int, float)):
+            return False
+        now = time.monotonic()
+        self._attr_aggregate.append(float(value), now)
+        self._attr_aggregate_pending = True
+        # The first sample is written right away instead of after an interval.
+        if self._attr_native_value is None:
+            self._update_aggregates(now)
+            return True
+        return False
+
+    def _update_aggregates(self, now: float) -> None:
+        statistics = self._attr_aggregate.statistics(now)
+        attributes = self._attr_extra_state_attributes
+        for length, window in zip(self._attr_aggregate_windows, statistics):
+            for key, value in window.items():
+                if isinstance(value, float):
+                    value = round(value, 2)
+                attributes[f"{key}_{length:g}s"] = value
+        if self._attr_aggregate_state == STAT_LAST:
+            self._attr_native_value = self._attr_aggregate.last
+        else:
+            value = statistics[0][self._attr_aggregate_state]
+            if value is not None:
+                self._attr_native_value = round(value, 2)
+            elif self._attr_native_value is None:
+                # Keep the state while the window is empty, before the first
+                # statistic show the last sample.
+                self._attr_native_value = self._attr_aggregate.last
+        self._attr_aggregate_pending = False
+
+    def _write_aggregates(self) -> None:
+        self._attr_aggregate_timer = self.hass.loop.call_later(
+            self._attr_aggregate_interval, self._write_aggregates
+        )
+        if not self._attr_aggregate_pending:
+            return
+        self._update_aggregates(time.monotonic())
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if self._attr_aggregate is not None:
+            self._attr_aggregate_timer = self.hass.loop.call_later(
+                self._attr_aggregate_interval, self._write_aggregates
+            )
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        if self._attr_aggregate_timer is not None:
+            self._attr_aggregate_timer.cancel()
+            self._attr_aggregate_timer = None
 
     def _to_device_class(self, type):
         if type == "common_temperature":
@@ -49,10 +137,93 @@ class HomeServerSensor(GiraEntity, sensor.SensorEntity):
             return DEVICE_CLASS_ILLUMINANCE
         return None
 
-    async def handle_cmd(self, cmd: dict) -> None:
-        val = cmd["value"]
-        if val != self._attr_native_value:
-            self._attr_native_value = val
-            if self.hass is None:
-                return
-            self.schedule_update_ha_state()
+
+def _metric_sensors(api: "HomeServerV2") -> list:
+    metrics = api.metrics
+
+    def p99_ms(histogram):
+        p99 = histogram.percentile(99)
+        return round(p99 * 1000, 2) if p99 is not None else None
+
+    return [
+        HomeServerMetricSensor(
+            api,
+            "telegram_rate",
+            "Telegrams per second",
+            lambda: round(metrics.sample_rate(), 2),
+            "telegrams/s",
+            sensor.STATE_CLASS_MEASUREMENT,
+        ),
+        HomeServerMetricSensor(
+            api,
+            "telegrams_unknown",
+            "Unknown telegrams",
+            lambda: metrics.telegrams_unknown,
+            None,
+            sensor.STATE_CLASS_TOTAL_INCREASING,
+        ),
+        HomeServerMetricSensor(
+            api,
+            "dispatch_latency_p99",
+            "Dispatch latency p99",
+            lambda: p99_ms(metrics.dispatch_latency),
+            "ms",
+            sensor.STATE_CLASS_MEASUREMENT,
+        ),
+        HomeServerMetricSensor(
+            api,
+            "command_latency_p99",
+            "Command latency p99",
+            lambda: p99_ms(metrics.command_latency),
+            "ms",
+            sensor.STATE_CLASS_MEASUREMENT,
+        ),
+        HomeServerMetricSensor(
+            api,
+            "send_queue_depth",
+            "Send queue depth",
+            lambda: api.send_queue_depth,
+            None,
+            sensor.STATE_CLASS_MEASUREMENT,
+        ),
+        HomeServerMetricSensor(
+            api,
+            "sweep_drift",
+            "Sweep drift",
+            lambda: api.sweep_drift,
+            None,
+            sensor.STATE_CLASS_TOTAL_INCREASING,
+        ),
+        HomeServerMetricSensor(
+            api,
+            "reconnects",
+            "Reconnects",
+            lambda: api.reconnects,
+            None,
+            sensor.STATE_CLASS_TOTAL_INCREASING,
+        ),
+    ]
+
+
+class HomeServerMetricSensor(sensor.SensorEntity):
+    """Diagnostic sensor polling one runtime metric of the HomeServer connection."""
+
+    def __init__(
+        self,
+        api: "HomeServerV2",
+        key: str,
+        name: str,
+        value_fn: typing.Callable[[], typing.Any],
+        unit: typing.Optional[str],
+        state_class: str,
+    ) -> None:
+        super().__init__()
+        self._value_fn = value_fn
+        self._attr_name = f"Gira HomeServer {api.host} {name}"
+        self._attr_unique_id = f"{api.host}_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    async def async_update(self) -> None:
+        self._attr_native_value = self._value_fn()
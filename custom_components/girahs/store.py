@@ -0,0 +1,61 @@
+from array import array
+from typing import Any, Optional
+
+try:
+    from .const import GA_COUNT
+except ImportError:
+    from const import GA_COUNT
+
+
+class ValueStore(object):
+    """Last value, the time it was received and the sequence number of its last
+    change per integer group address.
+
+    Every change of a value takes the next number of a global sequence, so
+    consumers can ask for the changes since the sequence number they saw last
+    instead of walking all addresses or entities."""
+
+    def __init__(self) -> None:
+        self._values: list[Any] = [None] * GA_COUNT
+        # Unix time of the last update, 0 if the address was never seen.
+        self._times = array("d", bytes(8 * GA_COUNT))
+        self._seqs = array("Q", bytes(8 * GA_COUNT))
+        self.seq = 0
+        # Addresses in the order of their last change, oldest first.
+        self._changed: dict[int, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._changed)
+
+    def update(self, ga: int, value: Any, timestamp: float) -> bool:
+        """Store the value received for ga, returns True if it changed."""
+        self._times[ga] = timestamp
+        if self._seqs[ga] and self._values[ga] == value:
+            return False
+        self.seq += 1
+        self._values[ga] = value
+        self._seqs[ga] = self.seq
+        self._changed.pop(ga, None)
+        self._changed[ga] = None
+        return True
+
+    def value(self, ga: int) -> Any:
+        return self._values[ga]
+
+    def get(self, ga: int) -> Optional[tuple[Any, float, int]]:
+        """Value, time and sequence number of ga, None if it was never seen."""
+        if not self._seqs[ga]:
+            return None
+        return self._values[ga], self._times[ga], self._seqs[ga]
+
+    def changes_since(self, seq: int) -> list[tuple[int, Any, float, int]]:
+        """Address, value, time and sequence number of the addresses that changed
+        after seq, in the order of the changes."""
+        changes = []
+        seqs = self._seqs
+        for ga in reversed(self._changed):
+            if seqs[ga] <= seq:
+                break
+            changes.append((ga, self._values[ga], self._times[ga], seqs[ga]))
+        changes.reverse()
+        return changes
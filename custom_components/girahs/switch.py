@@ -1,10 +1,19 @@
 import asyncio
 from datetime import timedelta
 import logging
+import time
 from os import name
 import typing
+from custom_components.girahs import dpt
 from custom_components.girahs.entity import GiraEntity
-from custom_components.girahs.helper import create_cmd, to_ga, to_gira_pct, to_hass_byte
+from custom_components.girahs.helper import (
+    command_ga,
+    create_cmd,
+    platform_setup_done,
+    to_ga,
+    to_gira_pct,
+    to_hass_byte,
+)
 
 from homeassistant import core
 from homeassistant import config_entries
@@ -29,19 +38,21 @@ from .gira import HomeServerV2
 logger = logging.getLogger(__name__)
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: core.HomeAssistant,
     config: config_entries.ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: typing.Optional[DiscoveryInfoType] = None,
 ) -> None:
+    start = time.monotonic()
     logger.info("Setting up Switches")
-    api: HomeServerV2 = hass.data[DOMAIN]["api"]
+    servers: list[HomeServerV2] = hass.data[DOMAIN]["servers"]
 
-    covers = [HomeServerSwitch(l, api) for l in api.switches]
+    covers = [HomeServerSwitch(l, api) for api in servers for l in api.switches]
 
     # Add the entities to Home Asssitant
-    add_entities(covers)
+    async_add_entities(covers)
+    platform_setup_done(hass, "switch", len(covers), start)
 
 
 class HomeServerSwitch(GiraEntity, SwitchEntity):
@@ -53,31 +64,17 @@ class HomeServerSwitch(GiraEntity, SwitchEntity):
         self._attr_address = data["address"][0]
         self._attr_state_address = data["state_address"][0]
         self._attr_switch_address = data["address"][0]
+        self._attr_address_ga = command_ga(self._attr_address)
         self._attr_is_on = False
 
-        self._attr_api.add_entity(self._attr_address, self)
-
-    def should_poll(self) -> bool:
-        return False
-
-    async def handle_cmd(self, cmd: dict) -> None:
-        val = cmd["value"]
-        if val == 1 and not self._attr_is_on:
-            self._attr_is_on = True
-            self.schedule_update_ha_state()
-        if val == 0 and self._attr_is_on:
-            self._attr_is_on = False
-            self.schedule_update_ha_state()
+        self.bind(self._attr_state_address, "_attr_is_on", dpt.boolean)
 
     async def async_turn_on(self, **kwargs):
-        # Changing brightness will turn the lamp on as well
         if not self._attr_is_on:
-            cmd = create_cmd(to_ga(self._attr_address), 1)
-            asyncio.create_task(self._attr_api.send_command(cmd))
-            self._attr_is_on = True
+            cmd = create_cmd(self._attr_address_ga, 1)
+            self.send_optimistic(cmd, self._attr_state_address, 1, "_attr_is_on", True)
 
     async def async_turn_off(self, **kwargs: typing.Any) -> None:
         if self._attr_is_on:
-            cmd = create_cmd(to_ga(self._attr_address), 0)
-            asyncio.create_task(self._attr_api.send_command(cmd))
-            self._attr_is_on = False
+            cmd = create_cmd(self._attr_address_ga, 0)
+            self.send_optimistic(cmd, self._attr_state_address, 0, "_attr_is_on", False)
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from custom_components.girahs.helper import from_ga
+from custom_components.girahs.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PendingCommand(object):
+    __slots__ = ("value", "owner", "sent", "rollback", "timer")
+
+    def __init__(
+        self,
+        value: Any,
+        owner: Any,
+        sent: float,
+        rollback: Optional[Callable[[], None]],
+    ) -> None:
+        self.value = value
+        self.owner = owner
+        self.sent = sent
+        self.rollback = rollback
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class CommandTracker(object):
+    """Correlates sent commands with the status telegram confirming them.
+
+    An entity applying a command optimistically registers the value it expects
+    on its status address together with a rollback. The first status telegram
+    for the address confirms the command, when none arrives within the timeout
+    the optimistic state is rolled back."""
+
+    def __init__(self, metrics: Metrics, timeout: float) -> None:
+        self._metrics = metrics
+        self._timeout = timeout
+        # Pending command per integer status group address.
+        self._pending: dict[int, PendingCommand] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def expect(
+        self,
+        ga: int,
+        value: Any,
+        owner: Any,
+        rollback: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Expect value on the status address ga after a command of owner, None
+        accepts any value."""
+        pending = PendingCommand(value, owner, time.monotonic(), rollback)
+        previous = self._pending.get(ga)
+        if previous is not None:
+            previous.timer.cancel()
+            # Roll back to the state before the first unconfirmed command.
+            if previous.owner is owner and previous.rollback is not None:
+                pending.rollback = previous.rollback
+        pending.timer = asyncio.get_running_loop().call_later(
+            self._timeout, self._expire, ga
+        )
+        self._pending[ga] = pending
+
+    def confirm(self, ga: int, value: Any, received: Optional[float] = None) -> Any:
+        """Match a status telegram against the pending command for ga, returns
+        the owner of the command if the telegram is the echo of it.
+
+        Only a telegram reporting the expected value is an echo. When any value
+        was accepted, the telegram confirms the command but is still applied."""
+        pending = self._pending.pop(ga, None)
+        if pending is None:
+            return None
+        pending.timer.cancel()
+        latency = (received or time.monotonic()) - pending.sent
+        self._metrics.command_latency.record(latency)
+        if pending.value is None:
+            self._metrics.commands_confirmed += 1
+            return None
+        if pending.value == value:
+            self._metrics.commands_confirmed += 1
+            return pending.owner
+        # The device reported a different state, which will be applied instead.
+        self._metrics.commands_contradicted += 1
+        return None
+
+    def _expire(self, ga: int) -> None:
+        pending = self._pending.pop(ga, None)
+        if pending is None:
+            return
+        self._metrics.commands_timed_out += 1
+        logger.warning(
+            "No confirmation on %s within %.1fs, rolling back",
+            from_ga(ga),
+            self._timeout,
+        )
+        if pending.rollback is not None:
+            pending.rollback()
+
+    def cancel(self) -> None:
+        for pending in self._pending.values():
+            pending.timer.cancel()
+        self._pending.clear()
@@ -0,0 +1,39 @@
+from typing import Optional
+
+
+class TravelModel(object):
+    """Estimates the position of a cover moving at constant speed between the
+    position it started at and its target, positions are in percent."""
+
+    def __init__(self, travel_time: float) -> None:
+        # Percent per second for a full travel in travel_time seconds.
+        self._speed = 100.0 / travel_time
+        self._start = 0.0
+        self._started = 0.0
+        self.target: Optional[float] = None
+
+    @property
+    def moving(self) -> bool:
+        return self.target is not None
+
+    def start(self, position: float, target: float, now: float) -> None:
+        self._start = position
+        self._started = now
+        self.target = target
+
+    def position(self, now: float) -> float:
+        """Estimated position, the target once it has been reached."""
+        if self.target is None:
+            return self._start
+        travelled = (now - self._started) * self._speed
+        if abs(self.target - self._start) <= travelled:
+            return self.target
+        if self.target > self._start:
+            return self._start + travelled
+        return self._start - travelled
+
+    def stop(self, now: float) -> float:
+        """Stop moving, returns the estimated position."""
+        self._start = self.position(now)
+        self.target = None
+        return self._start
@@ -1,10 +1,18 @@
 import asyncio
 from datetime import timedelta
 import logging
+import time
 from os import name
 import typing
+from custom_components.girahs import dpt
 from custom_components.girahs.entity import GiraEntity
-from custom_components.girahs.helper import create_cmd, to_ga, to_gira_pct, to_hass_byte
+from custom_components.girahs.helper import (
+    create_cmd,
+    platform_setup_done,
+    to_ga,
+    to_gira_pct,
+    to_hass_byte,
+)
 
 from homeassistant import core
 from homeassistant import config_entries
@@ -30,19 +38,39 @@ from .gira import HomeServerV2
 logger = logging.getLogger(__name__)
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: core.HomeAssistant,
     config: config_entries.ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: typing.Optional[DiscoveryInfoType] = None,
 ) -> None:
+    start = time.monotonic()
     logger.info("Setting up Switches")
-    api: HomeServerV2 = hass.data[DOMAIN]["api"]
+    servers: list[HomeServerV2] = hass.data[DOMAIN]["servers"]
 
-    covers = [HomeServerWeather(l, api) for l in api.weathers]
+    covers = [HomeServerWeather(l, api) for api in servers for l in api.weathers]
 
     # Add the entities to Home Asssitant
-    add_entities(covers)
+    async_add_entities(covers)
+    platform_setup_done(hass, "weather", len(covers), start)
+
+
+# Configuration key of the address, attribute and conversion of every value.
+WEATHER_ROLES = (
+    ("address_temperature", "_attr_temperature", dpt.identity),
+    ("address_air_pressure", "_attr_pressure", dpt.pa_to_hpa),
+    ("address_humidity", "_attr_humidity", dpt.identity),
+    ("address_wind_speed", "_attr_wind_speed", dpt.ms_to_kmh),
+    ("address_wind_bearing", "_attr_wind_bearing", dpt.identity),
+)
+
+# The weather entity has no brightness, it is exposed as state attributes in lux.
+BRIGHTNESS_ROLES = (
+    ("address_brightness_south", "brightness_south"),
+    ("address_brightness_west", "brightness_west"),
+    ("address_brightness_east", "brightness_east"),
+    ("address_brightness_north", "brightness_north"),
+)
 
 
 class HomeServerWeather(GiraEntity, weather.WeatherEntity):
@@ -51,46 +79,13 @@ class HomeServerWeather(GiraEntity, weather.WeatherEntity):
         weather.WeatherEntity.__init__(self)
         logger.info("Weather %s", data)
         self._attr_unique_id = data["name"]
-        self._attr_address_wind_bearing = data["address_wind_bearing"][0]
-        self._attr_address_wind_speed = data["address_wind_speed"][0]
-        self._attr_address_temperature = data["address_temperature"][0]
-        self._attr_address_brightness_south = data["address_brightness_south"][0]
-        self._attr_address_brightness_west = data["address_brightness_west"][0]
-        self._attr_address_brightness_east = data["address_brightness_east"][0]
-        self._attr_address_brightness_north = data["address_brightness_north"][0]
-        self._attr_address_air_pressure = data["address_air_pressure"][0]
-        self._attr_address_wind_bearing = data["address_humidity"][0]
 
         # Configure the unit
         self._attr_temperature_unit = TEMP_CELSIUS
         self._attr_condition = ""
         self._attr_temperature = 0
 
-        for a in [
-            self._attr_address_temperature,
-            self._attr_address_wind_speed,
-            self._attr_address_wind_bearing,
-            self._attr_address_air_pressure,
-        ]:
-            self._attr_api.add_entity(a, self)
-
-    async def handle_cmd(self, cmd: dict) -> None:
-        value = cmd["value"]
-
-        if cmd["address"] == self._attr_address_temperature:
-            self._attr_temperature = value
-            self.schedule_update_ha_state()
-
-        if cmd["address"] == self._attr_address_air_pressure:
-            # resolution is 0.01 hpa ->
-            self._attr_pressure = value / 100
-            self.schedule_update_ha_state()
-
-        if cmd["address"] == self._attr_address_wind_speed:
-            # Resolution is
-            self._attr_wind_speed = value * 3.6
-            self.schedule_update_ha_state()
-
-        if cmd["address"] == self._attr_address_wind_bearing:
-            self._attr_wind_bearing = value
-            self.schedule_update_ha_state()
+        for key, attr, converter in WEATHER_ROLES:
+            self.bind(data[key][0], attr, converter)
+        for key, name in BRIGHTNESS_ROLES:
+            self.bind_state_attribute(data[key][0], name)
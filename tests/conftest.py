@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# The modules without Home Assistant imports can be tested on their own, like
+# the benchmarks use them.
+sys.path[:0] = [ROOT, os.path.join(ROOT, "custom_components", "girahs")]
@@ -0,0 +1,56 @@
+import pytest
+
+import dpt
+
+
+@pytest.mark.parametrize(
+    "percent, byte", [(0, 0), (1, 3), (50, 128), (99, 252), (100, 255)]
+)
+def test_percent_to_byte(percent, byte):
+    assert dpt.percent_to_byte(percent) == byte
+
+
+@pytest.mark.parametrize(
+    "byte, percent", [(0, 0), (1, 0), (128, 50), (254, 100), (255, 100)]
+)
+def test_byte_to_percent(byte, percent):
+    assert dpt.byte_to_percent(byte) == percent
+
+
+@pytest.mark.parametrize("value, expected", [(-10, 0), (120, 255)])
+def test_percent_to_byte_clamps(value, expected):
+    assert dpt.percent_to_byte(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [(-10, 0), (300, 100)])
+def test_byte_to_percent_clamps(value, expected):
+    assert dpt.byte_to_percent(value) == expected
+
+
+def test_percent_round_trip():
+    for percent in range(101):
+        assert dpt.byte_to_percent(dpt.percent_to_byte(percent)) == percent
+
+
+def test_byte_round_trip_is_stable():
+    # Not every brightness has its own percentage, but converting back and forth
+    # twice must not drift.
+    for byte in range(256):
+        once = dpt.percent_to_byte(dpt.byte_to_percent(byte))
+        assert abs(once - byte) <= 2
+        assert dpt.percent_to_byte(dpt.byte_to_percent(once)) == once
+
+
+def test_pa_to_hpa():
+    assert dpt.pa_to_hpa(101325) == pytest.approx(1013.25)
+    assert dpt.pa_to_hpa(0) == 0
+
+
+def test_ms_to_kmh():
+    assert dpt.ms_to_kmh(10) == pytest.approx(36.0)
+    assert dpt.ms_to_kmh(0) == 0
+
+
+def test_boolean():
+    assert dpt.boolean(1) is True
+    assert dpt.boolean(0) is False
@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.girahs import dpt  # noqa: E402
+from custom_components.girahs.entity import GiraEntity  # noqa: E402
+
+
+class FakeApi(object):
+    unique_id_prefix = ""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def add_entity(self, address, entity, handler=None):
+        self.handlers[address] = handler
+
+
+def create_entity(**options):
+    api = FakeApi()
+    entity = GiraEntity({"name": "test", **options}, api)
+    entity._attr_brightness = None
+    return entity, api
+
+
+def receive(api, address, value):
+    return api.handlers[address](
+        {"cmd": 1, "ga": 0, "address": address, "value": value}
+    )
+
+
+def test_bind_converts_and_applies():
+    entity, api = create_entity()
+    entity.bind("1/0/1", "_attr_brightness", dpt.percent_to_byte)
+
+    assert receive(api, "1/0/1", 50)
+    assert entity._attr_brightness == 128
+
+
+def test_bind_without_filter_ignores_unchanged_values():
+    entity, api = create_entity()
+    entity.bind("1/0/1", "_attr_brightness", dpt.percent_to_byte)
+
+    assert receive(api, "1/0/1", 100)
+    assert not receive(api, "1/0/1", 100)
+    assert entity._attr_brightness == 255
+
+
+def test_bind_state_attribute():
+    entity, api = create_entity()
+    entity.bind_state_attribute("1/0/2", "pressure", dpt.pa_to_hpa)
+
+    assert receive(api, "1/0/2", 101325)
+    assert entity._attr_extra_state_attributes["pressure"] == pytest.approx(1013.25)
+
+
+def test_bind_with_filter_holds_back_values_within_deadband():
+    entity, api = create_entity(deadband=10)
+    entity.bind("1/0/1", "_attr_brightness")
+
+    # The first value is always applied.
+    assert receive(api, "1/0/1", 100)
+    assert not receive(api, "1/0/1", 105)
+    assert entity._attr_brightness == 100
+    assert receive(api, "1/0/1", 120)
+    assert entity._attr_brightness == 120
@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.girahs import project  # noqa: E402
+
+
+def entry(address, name, dpt, *ranges):
+    return {"address": address, "name": name, "dpt": dpt, "range": list(ranges)}
+
+
+def test_room_layout_pairs_addresses_by_name():
+    entities = project.generate_entities(
+        [
+            entry("1/0/1", "Decke Schalten", [1, 1], "EG", "Bad"),
+            entry("1/0/2", "Spiegel Schalten", [1, 1], "EG", "Bad"),
+            entry("1/0/3", "Decke Dimmwert", [5, 1], "EG", "Bad"),
+            entry("1/0/4", "Decke Status", [1, 1], "EG", "Bad"),
+        ]
+    )
+    assert entities["light"] == [
+        {
+            "name": "Decke",
+            "address": ["1/0/1"],
+            "state_address": ["1/0/4"],
+            "brightness_address": ["1/0/3"],
+        }
+    ]
+    assert entities["switch"] == [
+        {"name": "Spiegel", "address": ["1/0/2"], "state_address": ["1/0/2"]}
+    ]
+
+
+def test_room_layout_pairs_addresses_in_order():
+    entities = project.generate_entities(
+        [
+            entry("1/0/1", "Licht 1", [1, 1], "Bad"),
+            entry("1/0/2", "Licht 2", [1, 1], "Bad"),
+            entry("1/0/3", "Dimmer", [5, 1], "Bad"),
+        ]
+    )
+    assert [e["address"] for e in entities["light"]] == [["1/0/1"]]
+    assert entities["light"][0]["brightness_address"] == ["1/0/3"]
+    assert [e["address"] for e in entities["switch"]] == [["1/0/2"]]
+
+
+def test_function_layout_groups_function_ranges():
+    entities = project.generate_entities(
+        [
+            entry("1/0/1", "Bad Decke", [1, 1], "Licht", "Schalten"),
+            entry("1/0/2", "Bad Spiegel", [1, 1], "Licht", "Schalten"),
+            entry("1/1/1", "Bad Decke", [5, 1], "Licht", "Dimmen Wert"),
+            entry("1/2/1", "Bad Decke", [1, 1], "Licht", "Status"),
+            entry("1/2/2", "Bad Spiegel", [1, 1], "Licht", "Status"),
+        ]
+    )
+    assert entities["light"] == [
+        {
+            "name": "Bad Decke",
+            "address": ["1/0/1"],
+            "state_address": ["1/2/1"],
+            "brightness_address": ["1/1/1"],
+        }
+    ]
+    assert entities["switch"] == [
+        {"name": "Bad Spiegel", "address": ["1/0/2"], "state_address": ["1/2/2"]}
+    ]
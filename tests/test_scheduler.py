@@ -0,0 +1,35 @@
+import asyncio
+
+from const import PRIORITY_BACKGROUND
+from scheduler import CommandScheduler
+
+
+def send_all(*puts):
+    async def run():
+        sent = []
+
+        async def sender(cmd):
+            sent.append((cmd["ga"], cmd["value"]))
+
+        scheduler = CommandScheduler(sender, 1000, 100)
+        for ga, value, *priority in puts:
+            scheduler.put({"cmd": 1, "ga": ga, "value": value}, *priority)
+        task = asyncio.create_task(scheduler.run())
+        while len(scheduler):
+            await asyncio.sleep(0.001)
+        task.cancel()
+        return sent, scheduler
+
+    return asyncio.run(run())
+
+
+def test_superseding_command_keeps_order_of_final_writes():
+    # Brightness 30, off, brightness 80.
+    sent, scheduler = send_all((2, 30), (1, 0), (2, 80))
+    assert sent == [(1, 0), (2, 80)]
+    assert scheduler.coalesced == 1
+
+
+def test_interactive_command_supersedes_background_command():
+    sent, _ = send_all((1, 0, PRIORITY_BACKGROUND), (2, 5), (1, 1))
+    assert sent == [(2, 5), (1, 1)]
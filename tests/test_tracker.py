@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.girahs.metrics import Metrics  # noqa: E402
+from custom_components.girahs.tracker import CommandTracker  # noqa: E402
+
+
+def confirm(expected, value):
+    async def run():
+        metrics = Metrics()
+        tracker = CommandTracker(metrics, 10)
+        tracker.expect(1, expected, "owner")
+        return tracker.confirm(1, value), metrics
+
+    return asyncio.run(run())
+
+
+def test_confirm_suppresses_echo_of_expected_value():
+    owner, metrics = confirm(50, 50)
+    assert owner == "owner"
+    assert metrics.commands_confirmed == 1
+
+
+def test_confirm_applies_differing_value():
+    owner, metrics = confirm(50, 51)
+    assert owner is None
+    assert metrics.commands_contradicted == 1
+
+
+def test_confirm_applies_value_when_any_is_accepted():
+    owner, metrics = confirm(None, 51)
+    assert owner is None
+    assert metrics.commands_confirmed == 1